@@ -1,15 +1,2548 @@
 import os
+import sys
+import ast
+import math
+import json
+import queue
+import pickle
+import time
+import stat
+import inspect
+import socket
+import hashlib
+import collections
+import operator
+import warnings
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import pygame # type: ignore
 import tempfile
+import textwrap
 import numpy as np
 import sympy as sp
-import matplotlib.pyplot as plt
+import matplotlib
+import matplotlib.style
+import matplotlib.figure
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageDraw, ImageFont
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from scipy.integrate import quad
+from matplotlib.widgets import SpanSelector
+from scipy.integrate import quad, cumulative_trapezoid
+try:
+    from scipy.integrate import cumulative_simpson
+except ImportError:  # SciPy < 1.12
+    cumulative_simpson = None
 from scipy.optimize import brentq # type: ignore
+from scipy.signal import savgol_filter
+import scipy.special
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# Documented grammar: name -> (NumPy implementation, SymPy implementation)
+PARSER_FUNCTIONS = {
+    "sin": (np.sin, sp.sin), "cos": (np.cos, sp.cos), "tan": (np.tan, sp.tan),
+    "exp": (np.exp, sp.exp), "log": (np.log, sp.log), "sqrt": (np.sqrt, sp.sqrt)
+}
+PARSER_CONSTANTS = {"pi": (np.pi, sp.pi), "e": (np.e, sp.E)}
+PARSER_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Pow: operator.pow
+}
+MAX_POLY_DEGREE = 64
+
+DERIVATIVE_METHODS = ["Finite Difference", "Richardson", "Automatic (AD)", "Taylor (Jet)", "Spectral (FFT)"]
+# base steps tried per sample, as multiples of the order's ideal step
+RICHARDSON_STEP_FACTORS = (0.25, 1.0, 4.0, 16.0)
+RICHARDSON_LEVELS = 3
+# no step is longer than this or the grid spacing, however large |x| gets
+RICHARDSON_MAX_STEP = 0.1
+COMPLEX_STEP = 1e-100
+# the spectral engine doubles the FFT size until the tail of the spectrum is this small
+SPECTRAL_SIZES = (256, 512, 1024, 2048, 4096)
+SPECTRAL_TOLERANCE = 1e-10
+# ranges spanning fewer periods than this are cheap enough to evaluate directly
+MIN_PERIODS_TO_TILE = 2
+# samples past x = 0, per derivative order, differenced with half of a symmetric grid so the fold is no edge
+MIRROR_GHOST_SAMPLES = 4
+
+PLOT_SAMPLES = 400
+# the preview drawn before the full-accuracy pass
+PROGRESSIVE_COARSE_SAMPLES = 64
+# live mode waits this long after the last keystroke before replotting
+LIVE_DEBOUNCE_MS = 300
+# per-function results kept around while typing
+ARTIFACT_CACHE_SIZE = 32
+# zooming/panning settles for this long before the visible window is resampled
+VIEW_DEBOUNCE_MS = 100
+# expression samples per pixel column behind the min/max envelope
+ENVELOPE_OVERSAMPLE = 8
+# shared grid every pair of curves is scanned on for crossings
+INTERSECTION_SAMPLES = 2048
+# derivative samples below this fraction of their largest value count as zero
+SHAPE_TOLERANCE = 1e-6
+
+# compiled kernels survive between sessions here
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".derivaplot", "kernels")
+CACHE_FORMAT = 1
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+# how long a plot waits for sp.integrate before using the numeric integral
+INTEGRAL_TIME_BUDGET = 0.25
+# sp.integrate runs in a worker process that is killed after this long
+# (counted as "no closed form"); the dispatcher checks on it this often
+INTEGRAL_TIMEOUT = 60
+INTEGRAL_POLL = 0.05
+
+# measured data: CSV files (and NPY files in other layouts) are converted
+# once into memory-mappable (2, N) arrays here
+DATA_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".derivaplot", "data")
+DATA_CACHE_MAX_BYTES = 4 * 1024 ** 3
+DATA_CHUNK_ROWS = 262144
+# Savitzky-Golay window, in samples, for derivatives of measured data
+# (short series use an eighth of their length)
+SAVGOL_WINDOW = 31
+# denser data is averaged into this many even x-bins before filtering
+DATA_DERIVATIVE_BINS = 4096
+# each pyramid level merges this many tiles of the one below, up to a top
+# level of at most PYRAMID_TOP_TILES
+PYRAMID_FANOUT = 8
+PYRAMID_TOP_TILES = 1024
+
+# live streams: samples kept on screen, redraw cap, rolling-slope width,
+# how far back a tailed file starts and how often idle readers poll
+STREAM_CAPACITY = 20000
+STREAM_FPS = 30
+STREAM_WINDOW = 15
+STREAM_BACKLOG_BYTES = 1 << 20
+STREAM_POLL = 0.05
+
+# background exports: resolution of saved images and how often the UI checks on them
+EXPORT_DPI = 300
+EXPORT_POLL_MS = 200
+# one color per function, as the tab10 cycle
+PLOT_COLORS = matplotlib.colormaps["tab10"].colors
+# figure colors for each appearance mode, applied in one pass by apply_theme
+THEMES = {
+    "light": {"background": "white", "text": "black"},
+    "dark": {"background": "#242424", "text": "white"},
+}
+# PDF report: A4 portrait pages, analyses running ahead of the page writer, rows per table
+REPORT_PAGE_SIZE = (8.27, 11.69)
+REPORT_WORKERS = min(4, os.cpu_count() or 1)
+REPORT_TABLE_ROWS = 16
+# batch reports: one worker process per core, Tk-free
+BATCH_PROCESSES = os.cpu_count() or 1
+
+
+class CompileCache:
+    """On-disk cache of lambdified kernels (generated source + metadata).
+
+    Entries are keyed by the whitespace-normalized expression text together
+    with the SymPy/NumPy/SciPy versions and the backend, so a hit never touches the
+    SymPy parser. Files are named after a version tag, which makes stale
+    entries cheap to spot, and the directory is trimmed oldest-first once it
+    grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, backend=("scipy", "numpy")):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # scipy first, so special functions (erf, gamma, ...) vectorize too
+        self.backend = list(backend)
+        self.versions = {
+            "format": CACHE_FORMAT,
+            "sympy": sp.__version__,
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "backend": self.backend
+        }
+        self.version_tag = hashlib.sha256(json.dumps(self.versions, sort_keys=True).encode()).hexdigest()[:8]
+        self.memory = {}
+        self.missing = set()  # keys known to have no kernel
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.prune()
+        except OSError as e:
+            print(f"Compile cache disabled: {e}")
+            self.cache_dir = None
+
+    def key(self, text):
+        canonical = "".join(text.split())
+        return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{self.version_tag}-{key}.json")
+
+    def lookup(self, text):
+        key = self.key(text)
+        f = self.memory.get(key)
+        if f is None:
+            f = self.load(key)
+            if f is not None:
+                self.memory[key] = f
+        return f
+
+    def compile(self, text, build):
+        f = self.lookup(text)
+        if f is None:
+            key = self.key(text)
+            expr = build()
+            f = sp.lambdify(sp.Symbol('x'), expr, self.backend)
+            self.store(key, f, expr)
+            self.memory[key] = f
+        return f
+
+    def load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            if entry["versions"] != self.versions:
+                os.remove(path)
+                return None
+            if entry.get("missing"):
+                self.missing.add(key)
+                os.utime(path)
+                return None
+
+            namespace = {}
+            for name, ref in entry["globals"].items():
+                if "numpy" in ref:
+                    namespace[name] = getattr(np, ref["numpy"])
+                elif "scipy" in ref:
+                    namespace[name] = getattr(scipy.special, ref["scipy"])
+                else:
+                    namespace[name] = ref["value"]
+            exec(compile(entry["source"], f"<derivaplot-kernel {key}>", "exec"), namespace)
+            os.utime(path)  # keeps recently used kernels at the back of the eviction queue
+            return namespace[entry["name"]]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding cached kernel {key}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def known_missing(self, text):
+        # marked by mark_missing, this session or (once looked up) an earlier one
+        return self.key(text) in self.missing
+
+    def mark_missing(self, text):
+        """Remember that ``text`` has no kernel, so later sessions don't look for one."""
+        key = self.key(text)
+        self.missing.add(key)
+        if self.cache_dir is None:
+            return
+        try:
+            self.write(key, {"missing": True, "versions": self.versions, "created": time.time()})
+        except Exception as e:
+            print(f"Compile cache store failed: {e}")
+
+    def store(self, key, f, expr):
+        if self.cache_dir is None:
+            return
+        try:
+            # Only the NumPy/scipy.special names the generated code actually
+            # references are recorded, so loading needs neither SymPy nor lambdify.
+            references = {}
+            for name in f.__code__.co_names:
+                if name not in f.__globals__:
+                    continue  # builtins
+                value = f.__globals__[name]
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    references[name] = {"value": value}
+                elif getattr(np, getattr(value, "__name__", ""), None) is value:
+                    references[name] = {"numpy": value.__name__}
+                elif getattr(scipy.special, getattr(value, "__name__", ""), None) is value:
+                    references[name] = {"scipy": value.__name__}
+                else:
+                    return  # not reproducible without SymPy, skip caching
+
+            entry = {
+                "name": f.__name__,
+                "source": inspect.getsource(f),
+                "globals": references,
+                "canonical": sp.srepr(expr),
+                "versions": self.versions,
+                "created": time.time()
+            }
+            self.write(key, entry)
+        except Exception as e:
+            print(f"Compile cache store failed: {e}")
+
+    def write(self, key, entry):
+        # batch report workers share the directory, so temp names must not collide
+        tmp_path = f"{self.path(key)}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp_path, self.path(key))
+        self.prune()
+
+    def prune(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith(".json"):
+                continue
+            try:
+                if not name.startswith(self.version_tag + "-"):
+                    # written by another SymPy/NumPy version
+                    os.remove(path)
+                    continue
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue  # another process got to it first
+            entries.append((info.st_mtime, info.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _integral_worker(connection):
+    # sp.integrate can't be interrupted in a thread; in its own process it can be killed
+    x = sp.Symbol('x')
+    while True:
+        try:
+            expr = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send({"expr": sp.integrate(expr, x)})
+        except Exception as e:
+            print(f"Symbolic integration failed: {e}")
+            connection.send({"failed": True})
+
+
+class IntegralEngine:
+    """Closed-form antiderivatives for the integral curve.
+
+    ``sp.integrate`` runs in one worker process, a job at a time, and the
+    caller waits up to ``budget`` seconds the first time it asks for an
+    expression (later asks don't wait). A result that arrives late is still
+    picked up by the next plot or refresh. A job for an expression that is no
+    longer plotted (see ``retain``) or that runs past ``timeout`` has its
+    process killed; the next job starts a fresh one. Kernels, and the
+    expressions without a closed form, go through the compile cache, so later
+    sessions skip the integration entirely.
+    """
+
+    def __init__(self, compile_cache, budget=INTEGRAL_TIME_BUDGET, timeout=INTEGRAL_TIMEOUT):
+        self.compile_cache = compile_cache
+        self.budget = budget
+        self.timeout = timeout
+        self.kernels = {}  # None marks "no usable closed form"
+        self.pending = {}  # source -> (done, slot) until the result is picked up
+        self.jobs = collections.OrderedDict()  # source -> (expr, done, slot), oldest first
+        self.wanted = None  # sources still plotted, None while nothing has been plotted
+        self.condition = threading.Condition()
+        self.dispatcher = None
+        self.process = self.connection = None
+        self.closed = False
+
+    def antiderivative(self, function):
+        source = "".join(function.source.split())
+        if source in self.kernels:
+            return self.kernels[source]
+
+        text = "integral:" + source
+        kernel = self.compile_cache.lookup(text)
+        if kernel is None:
+            if self.compile_cache.known_missing(text):
+                self.kernels[source] = None
+                return None
+            budget = 0  # waited for once already; zooming and panning shouldn't wait again
+            if source not in self.pending:
+                self.pending[source] = self._submit(source, function.sympy)
+                budget = self.budget
+            done, slot = self.pending[source]
+            if not done.wait(budget):
+                return None  # numeric curve for now
+            del self.pending[source]
+
+            if slot.get("cancelled"):
+                return None  # superseded; asked for again, it starts over
+            expr = slot.get("expr")
+            if slot.get("timed_out") or (expr is not None and expr.has(sp.Integral)):
+                self.compile_cache.mark_missing(text)
+            if expr is None or expr.has(sp.Integral):
+                self.kernels[source] = None
+                return None
+            try:
+                kernel = self.compile_cache.compile(text, lambda: expr)
+            except Exception as e:
+                print(f"Antiderivative compile error: {e}")
+                kernel = None
+
+        if kernel is not None:
+            try:
+                with np.errstate(all="ignore"):
+                    kernel(np.array([0.5, 1.0]))  # a kernel that can't take arrays is no use
+            except Exception as e:
+                print(f"Antiderivative compile error: {e}")
+                kernel = None
+        self.kernels[source] = kernel
+        return kernel
+
+    def waiting(self, function):
+        # sp.integrate is queued or running (or done but not yet picked up) for this function
+        return "".join(function.source.split()) in self.pending
+
+    def retain(self, functions):
+        """Drop the integrations of everything but ``functions`` (the curves now plotted)."""
+        wanted = {"".join(f.source.split()) for f in functions if hasattr(f, "source")}
+        with self.condition:
+            self.wanted = wanted  # the dispatcher kills a running job that isn't
+            for source in [source for source in self.jobs if source not in wanted]:
+                _, done, slot = self.jobs.pop(source)
+                slot["cancelled"] = True
+                done.set()
+        for source in [source for source in self.pending if source not in wanted]:
+            del self.pending[source]
+
+    def start(self):
+        # the worker process takes seconds to start, so it can be started ahead of the first plot
+        with self.condition:
+            if self.dispatcher is None and not self.closed:
+                self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                self.dispatcher.start()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        process = self.process
+        if process is not None:
+            process.terminate()
+
+    def _submit(self, source, expr):
+        done = threading.Event()
+        slot = {}
+        with self.condition:
+            self.jobs[source] = (expr, done, slot)
+            if self.wanted is not None:
+                self.wanted.add(source)  # until the next retain says otherwise
+            self.condition.notify()
+        self.start()
+        return done, slot
+
+    def _dispatch(self):
+        try:
+            self._ensure_worker()
+        except Exception as e:
+            print(f"Symbolic integration failed: {e}")
+        while True:
+            with self.condition:
+                while not self.jobs and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                source, (expr, done, slot) = self.jobs.popitem(last=False)
+            try:
+                slot.update(self._run(source, expr))
+            except Exception as e:
+                if not self.closed:  # closing kills the worker under a running job
+                    print(f"Symbolic integration failed: {e}")
+                slot["failed"] = True
+                self._stop_worker()
+            finally:
+                done.set()
+
+    def _run(self, source, expr):
+        self._ensure_worker()
+        self.connection.send(expr)
+        deadline = time.monotonic() + self.timeout
+        while not self.connection.poll(INTEGRAL_POLL):
+            if self.closed or (self.wanted is not None and source not in self.wanted):
+                self._stop_worker()
+                return {"cancelled": True}
+            if time.monotonic() > deadline:
+                print(f"Symbolic integration of {source} timed out after {self.timeout} s")
+                self._stop_worker()
+                return {"timed_out": True}
+        return self.connection.recv()
+
+    def _ensure_worker(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        # spawn, as for batch reports: a forked Tk process is not safe to run on
+        context = multiprocessing.get_context("spawn")
+        connection, child = context.Pipe()
+        process = context.Process(target=_integral_worker, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        self.process, self.connection = process, connection
+
+    def _stop_worker(self):
+        process, self.process = self.process, None
+        if process is not None:
+            process.terminate()
+            process.join(1)
+
+
+class IntegralIndex:
+    """Prefix sums (the cumulative integral) of one plotted function.
+
+    The grid is uniform, so any definite integral inside the plotted range is
+    the difference of two entries interpolated in constant time.
+    """
+
+    def __init__(self, expr, x_vals, cumulative, y_vals):
+        self.expr = expr
+        self.x0 = x_vals[0]
+        self.dx = x_vals[1] - x_vals[0]
+        self.cumulative = np.asarray(cumulative, dtype=float)
+        self.y_vals = np.asarray(y_vals, dtype=float)
+
+    def at(self, x):
+        last = len(self.cumulative) - 1
+        t = min(max((x - self.x0) / self.dx, 0.0), last)
+        i = min(int(t), last - 1)
+        frac = t - i
+        # trapezoid over the partial cell rather than a straight line between prefix sums
+        y0, y1 = self.y_vals[i], self.y_vals[i + 1]
+        partial = frac * self.dx * (2 * y0 + frac * (y1 - y0)) / 2
+        if np.isfinite(partial):
+            return self.cumulative[i] + partial
+        return self.cumulative[i] * (1 - frac) + self.cumulative[i + 1] * frac
+
+    def area(self, a, b):
+        return self.at(b) - self.at(a)
+
+
+def sample_bracket(x_vals, x):
+    """(i, t) placing x at fraction t between x_vals[i - 1] and x_vals[i]; None off the grid.
+
+    `x_vals` has to be sorted; the lookup is one binary search.
+    """
+    last = len(x_vals) - 1
+    if last < 1 or not x_vals[0] <= x <= x_vals[last]:
+        return None
+    i = min(max(int(np.searchsorted(x_vals, x)), 1), last)
+    x0, x1 = x_vals[i - 1], x_vals[i]
+    return i, (x - x0) / (x1 - x0) if x1 > x0 else 1.0
+
+
+def line_value(line, x):
+    """The drawn height of `line` at x, between its vertices; nan past its ends."""
+    x_vals, y_vals = np.asarray(line.get_xdata()), np.asarray(line.get_ydata())
+    bracket = sample_bracket(x_vals, x)
+    if bracket is None:
+        return np.nan
+    i, t = bracket
+    return y_vals[i - 1] * (1 - t) + y_vals[i] * t
+
+
+class CurveRecord:
+    """One plotted function; its samples are row ``row`` of every ResultStore array."""
+
+    __slots__ = ("expr", "function", "row", "has_error", "integral_index")
+
+    def __init__(self, expr, function, row):
+        self.expr = expr
+        self.function = function
+        self.row = row
+        self.has_error = False
+        self.integral_index = None
+
+
+class ResultStore:
+    """Everything sampled for one plot, as one (functions, samples) array per kind.
+
+    Kinds are "values", "integral", "error" (the derivative error estimate,
+    nan when the method has none) and "d1", "d2", ... per derivative order.
+    All of it is allocated up front; lines, statistics, the area index and
+    exports read rows out as views instead of keeping their own copies.
+    A function that could not be calculated is marked failed and its rows
+    stay nan; the rest of the plot goes on without it.
+    """
+
+    def __init__(self, functions, x_vals, orders):
+        self.x = x_vals
+        self.orders = list(orders)
+        shape = (len(functions), len(x_vals))
+        kinds = ["values", "integral", "error"] + [f"d{order}" for order in self.orders]
+        self.arrays = {kind: np.full(shape, np.nan) for kind in kinds}
+        self.records = [CurveRecord(expr, f, i) for i, (expr, f) in enumerate(functions)]
+        self.filled = np.zeros(len(functions), dtype=bool)
+        self.failed = np.zeros(len(functions), dtype=bool)
+
+    def store(self, i, expr, f, y_vals, derivatives, integral_vals):
+        record = self.records[i]
+        record.expr, record.function = expr, f
+        self.arrays["values"][i] = y_vals
+        self.arrays["integral"][i] = integral_vals
+        for order in self.orders:
+            self.arrays[f"d{order}"][i] = derivatives[order][0]
+        error = derivatives[self.orders[-1]][1]
+        record.has_error = error is not None
+        self.arrays["error"][i] = error if error is not None else np.nan
+        record.integral_index = IntegralIndex(expr, self.x, self.arrays["integral"][i], self.arrays["values"][i])
+        self.filled[i] = True
+        self.failed[i] = False
+        return record
+
+    def fail(self, i):
+        for array in self.arrays.values():
+            array[i] = np.nan
+        record = self.records[i]
+        record.has_error, record.integral_index = False, None
+        self.filled[i] = False
+        self.failed[i] = True
+
+    def stored(self):
+        # the functions that were calculated, in plot order
+        return [record for record in self.records if self.filled[record.row]]
+
+    def row(self, kind, i):
+        return self.arrays[kind][i]
+
+    @property
+    def complete(self):
+        # every function has been calculated or given up on
+        return bool((self.filled | self.failed).all())
+
+    def values_for(self, expr, f, x_vals):
+        # the plotted samples of `expr`, if this store holds them on the same grid
+        if len(x_vals) != len(self.x) or x_vals[0] != self.x[0] or x_vals[-1] != self.x[-1]:
+            return None
+        for record in self.records:
+            if (self.filled[record.row] and record.expr == expr
+                    and getattr(record.function, "stamp", None) == getattr(f, "stamp", None)):
+                return self.arrays["values"][record.row]
+        return None
+
+    def curves(self):
+        # what a report page needs of each function, without the function object
+        # (a failed function goes without samples, the report worker retries it)
+        order = self.orders[-1]
+        return [
+            {"expr": record.expr, "x": self.x, "order": order, "values": self.arrays["values"][record.row],
+             "derivative": self.arrays[f"d{order}"][record.row], "integral": self.arrays["integral"][record.row]}
+            if self.filled[record.row] else {"expr": record.expr, "order": order}
+            for record in self.records
+        ]
+
+    def columns(self):
+        """Name -> view for x and f, f^(n) and the integral of every function."""
+        order = self.orders[-1]
+        columns = {"x": self.x}
+        for record in self.stored():
+            for name, kind in ((record.expr, "values"), (f"d{order} {record.expr}", f"d{order}"),
+                               (f"integral {record.expr}", "integral")):
+                unique, copy = name, 2
+                while unique in columns:  # the same expression typed twice
+                    unique, copy = f"{name} ({copy})", copy + 1
+                columns[unique] = self.arrays[kind][record.row]
+        return columns
+
+
+class ParsedExpression:
+    """A validated expression compiled to a NumPy closure.
+
+    The SymPy form is only built (from the same tree, never via ``sympify``)
+    the first time a symbolic feature asks for it.
+    """
+
+    def __init__(self, source, tree):
+        self.source = source
+        self.tree = tree
+        # highest-degree-first coefficients when the input is a polynomial
+        self.poly = _poly_node(tree)
+        if self.poly is not None:
+            coeffs = self.poly
+            self.evaluate = lambda x: horner(coeffs, x)
+        else:
+            self.evaluate = _compile_node(tree)
+        self._sympy = None
+
+    def __call__(self, x_vals):
+        result = self.evaluate(x_vals)
+        if np.ndim(result) == 0 and np.ndim(x_vals) > 0:
+            # constant expressions still have to plot as a line
+            result = np.full(np.shape(x_vals), result, dtype=float)
+        return result
+
+    @property
+    def sympy(self):
+        if self._sympy is None:
+            self._sympy = _sympy_node(self.tree)
+        return self._sympy
+
+
+def _validate_node(node):
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in PARSER_OPERATORS:
+            raise ValueError("Only +, -, *, / and ** are supported")
+        _validate_node(node.left)
+        _validate_node(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, (ast.UAdd, ast.USub)):
+            raise ValueError("Only +, -, *, / and ** are supported")
+        _validate_node(node.operand)
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in PARSER_FUNCTIONS:
+            name = getattr(node.func, "id", "this call")
+            raise ValueError(f"Unsupported function '{name}'")
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError(f"{node.func.id}() takes exactly one argument")
+        _validate_node(node.args[0])
+    elif isinstance(node, ast.Name):
+        if node.id != "x" and node.id not in PARSER_CONSTANTS:
+            raise ValueError(f"Unknown name '{node.id}' (use x as the variable)")
+    elif isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant {node.value!r}")
+    else:
+        raise ValueError("Unsupported syntax")
+
+
+def _compile_node(node):
+    if isinstance(node, ast.BinOp):
+        op = PARSER_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda x: op(left(x), right(x))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda x: -operand(x)
+        return operand
+    if isinstance(node, ast.Call):
+        func = PARSER_FUNCTIONS[node.func.id][0]
+        arg = _compile_node(node.args[0])
+        return lambda x: func(arg(x))
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return lambda x: x
+        value = PARSER_CONSTANTS[node.id][0]
+        return lambda x: value
+    value = np.float64(node.value)  # overflows to inf like NumPy instead of raising
+    return lambda x: value
+
+
+def _poly_node(node):
+    if isinstance(node, ast.BinOp):
+        left, right = _poly_node(node.left), _poly_node(node.right)
+        if left is None or right is None:
+            return None
+        op = type(node.op)
+        if op is ast.Add:
+            result = np.polyadd(left, right)
+        elif op is ast.Sub:
+            result = np.polysub(left, right)
+        elif op is ast.Mult:
+            result = np.polymul(left, right)
+        elif op is ast.Div:
+            if len(right) != 1 or right[0] == 0:
+                return None
+            result = left / right[0]
+        else:
+            if len(right) != 1:
+                return None
+            power = right[0]
+            if len(left) == 1:
+                with np.errstate(all="ignore"):
+                    result = np.array([left[0] ** power])
+            elif power < 0 or power != int(power) or (len(left) - 1) * power > MAX_POLY_DEGREE:
+                return None
+            else:
+                result = np.array([1.0])
+                for _ in range(int(power)):
+                    result = np.polymul(result, left)
+        return _trim_poly(result)
+    if isinstance(node, ast.UnaryOp):
+        operand = _poly_node(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Call):
+        arg = _poly_node(node.args[0])
+        if arg is None or len(arg) != 1:
+            return None
+        # a function of a constant is just a constant
+        with np.errstate(all="ignore"):
+            return np.array([PARSER_FUNCTIONS[node.func.id][0](arg[0])], dtype=float)
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return np.array([1.0, 0.0])
+        return np.array([PARSER_CONSTANTS[node.id][0]])
+    return np.array([float(node.value)])
+
+
+def _trim_poly(coeffs):
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), "f")
+    if not np.all(np.isfinite(coeffs)):
+        return None
+    return coeffs if len(coeffs) else np.array([0.0])
+
+
+def horner(coeffs, x_vals):
+    result = np.zeros_like(x_vals, dtype=float)
+    for c in coeffs:
+        result = result * x_vals + c
+    return result
+
+
+def polynomial_real_roots(coeffs):
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), "f")
+    if len(coeffs) < 2:
+        return np.array([])
+    try:
+        factors = _square_free_factors(tuple(float(c) for c in coeffs))
+    except Exception as e:
+        print(f"Square-free factorization error: {e}")
+        factors = (coeffs,)
+    roots = [_simple_real_roots(factor) for factor in factors if len(factor) > 1]
+    return np.unique(np.concatenate(roots)) if roots else np.array([])
+
+
+@functools.lru_cache(maxsize=256)
+def _square_free_factors(coeffs):
+    """The square-free factors of a polynomial, as highest-first float coefficients.
+
+    The split is exact (over the rationals the floats stand for), so a root of
+    any multiplicity is a simple root of exactly one factor instead of a
+    cluster np.roots scatters by about eps**(1/multiplicity).
+    """
+    poly = sp.Poly([sp.Rational(c) for c in coeffs], sp.Symbol('x'))
+    _, factors = poly.sqf_list()
+    return tuple(np.array([float(c) for c in factor.all_coeffs()]) for factor, _ in factors)
+
+
+def _simple_real_roots(coeffs):
+    # np.roots is the eigen solve of the companion matrix
+    roots = np.roots(coeffs)
+    # roots repeated only up to rounding in the coefficients still come back
+    # split by up to ~eps**(1/3), hence the loose tolerances
+    tol = 1e-5 * np.maximum(1.0, np.abs(roots))
+    real = np.sort(roots.real[np.abs(roots.imag) <= tol])
+    if len(real) == 0:
+        return real
+
+    groups = np.split(real, np.nonzero(np.diff(real) > 1e-5 * np.maximum(1.0, np.abs(real[1:])))[0] + 1)
+    merged = []
+    for group in groups:
+        center = group.mean()
+        # a multiple root leaves p at its center down in rounding noise; between
+        # genuinely distinct close roots p is measurably away from zero
+        noise = 8 * len(coeffs) * np.finfo(float).eps * horner(np.abs(coeffs), abs(center))
+        if len(group) == 1 or abs(horner(coeffs, center)) <= noise:
+            merged.append([center])
+        else:
+            merged.append(group)
+    real = np.concatenate(merged)
+
+    # one Newton step to polish, kept only where it actually helps
+    slope = horner(np.polyder(coeffs), real)
+    residual = horner(coeffs, real)
+    step = np.divide(residual, slope, out=np.zeros_like(real), where=slope != 0)
+    polished = real - step
+    better = np.abs(horner(coeffs, polished)) < np.abs(residual)
+    return np.where(better, polished, real)
+
+
+def _sympy_node(node):
+    if isinstance(node, ast.BinOp):
+        return PARSER_OPERATORS[type(node.op)](_sympy_node(node.left), _sympy_node(node.right))
+    if isinstance(node, ast.UnaryOp):
+        operand = _sympy_node(node.operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Call):
+        return PARSER_FUNCTIONS[node.func.id][1](_sympy_node(node.args[0]))
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return sp.Symbol('x')
+        return PARSER_CONSTANTS[node.id][1]
+    if isinstance(node.value, int):
+        return sp.Integer(node.value)
+    return sp.Float(node.value)
+
+
+@functools.lru_cache(maxsize=256)
+def parse_expression(source):
+    try:
+        # sympify used to read x^2 as x**2; rewriting the token keeps ** precedence
+        tree = ast.parse(source.strip().replace("^", "**"), mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Syntax error in '{source}': {e.msg}")
+    _validate_node(tree)
+    return ParsedExpression(source, tree)
+
+
+class SampledData:
+    """Measured (x, y) samples from a CSV or NPY file, usable like a parsed expression.
+
+    The samples are a memory-mapped (2, N) float64 array sorted by x, so
+    lookups never copy the file. Values, Savitzky-Golay derivatives and the
+    cumulative trapezoid integral are read off at any x by interpolation.
+    Outside the data the values are nan and the integral is held flat.
+    """
+
+    poly = None
+
+    def __init__(self, source, samples, stamp, key):
+        self.source = source
+        self.stamp = stamp  # file mtime and size, so an edited file is not served from caches
+        self.key = key
+        self.x, self.y = samples[0], samples[1]
+        self.smoothed = {}
+        self.cumulative = None
+        self._pyramid = None
+
+    def pyramid(self):
+        if self._pyramid is None:
+            self._pyramid = SamplePyramid(self)
+        return self._pyramid
+
+    def __call__(self, x_vals):
+        return np.interp(x_vals, self.x, self.y, left=np.nan, right=np.nan)
+
+    def derivative(self, x_vals, order):
+        if order not in self.smoothed:
+            grid, values = self.even_samples()
+            polyorder = order + 1
+            window = min(max(min(SAVGOL_WINDOW, len(grid) // 8), polyorder + 1) | 1, len(grid) - 1 + len(grid) % 2)
+            if window > polyorder:
+                smoothed = savgol_filter(values, window, polyorder, deriv=order, delta=grid[1] - grid[0])
+            else:
+                smoothed = values
+                for _ in range(order):
+                    smoothed = np.gradient(smoothed, grid)
+            self.smoothed[order] = (grid, smoothed)
+        grid, smoothed = self.smoothed[order]
+        return np.interp(x_vals, grid, smoothed, left=np.nan, right=np.nan)
+
+    def even_samples(self):
+        # the filter needs even spacing; dense data is bin-averaged, which
+        # also takes the edge off the noise before differentiating
+        if len(self.x) > DATA_DERIVATIVE_BINS:
+            bins = DATA_DERIVATIVE_BINS
+            width = (self.x[-1] - self.x[0]) / bins
+            index = np.minimum(((self.x - self.x[0]) / width).astype(np.intp), bins - 1)
+            counts = np.bincount(index, minlength=bins)
+            grid = self.x[0] + (np.arange(bins) + 0.5) * width
+            filled = counts > 0
+            means = np.bincount(index, weights=self.y, minlength=bins)[filled] / counts[filled]
+            centers = np.bincount(index, weights=self.x, minlength=bins)[filled] / counts[filled]
+            return grid, np.interp(grid, centers, means)
+        spacing = np.diff(self.x)
+        if np.ptp(spacing) > 1e-6 * np.mean(spacing):
+            grid = np.linspace(self.x[0], self.x[-1], len(self.x))
+            return grid, np.interp(grid, self.x, self.y)
+        return self.x, self.y
+
+    def integral(self, x_vals):
+        if self.cumulative is None:
+            self.cumulative = cumulative_trapezoid(self.y, self.x, initial=0)
+        # anchored at the plot's lower bound
+        return np.interp(x_vals, self.x, self.cumulative) - np.interp(x_vals[0], self.x, self.cumulative)
+
+
+class SamplePyramid:
+    """Min/max/mean tiles over a SampledData, PYRAMID_FANOUT times coarser per level.
+
+    Level 0 is the samples themselves; every other level is a memory-mapped
+    (6, n) array of tile x_lo, x_hi, min, max, sum and count in
+    DATA_CACHE_DIR, built once in chunks and reused across sessions. A view
+    picks the finest level with at most a couple of tiles per pixel column,
+    so drawing any window costs the same whatever the size of the data.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.levels = []
+        source_rows = None
+        size = len(data.x)
+        built = False
+        while size > PYRAMID_TOP_TILES:
+            path = os.path.join(DATA_CACHE_DIR, f"{data.key}-level{len(self.levels) + 1}.npy")
+            if not os.path.exists(path):
+                self._build(source_rows, path)
+                built = True
+            level = np.load(path, mmap_mode="r")
+            self.levels.append(level)
+            source_rows, size = level, level.shape[1]
+        if built:
+            _prune_data_cache(data.key)
+
+    def _build(self, below, path):
+        # below is None for the raw samples
+        size = len(self.data.x) if below is None else below.shape[1]
+        tiles = -(-size // PYRAMID_FANOUT)
+        os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+        tmp_path = path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(6, tiles))
+        step = DATA_CHUNK_ROWS - DATA_CHUNK_ROWS % PYRAMID_FANOUT
+        for start in range(0, size, step):
+            stop = min(start + step, size)
+            first, last = start // PYRAMID_FANOUT, -(-stop // PYRAMID_FANOUT)
+            starts = np.arange(start, stop, PYRAMID_FANOUT)
+            if below is None:
+                x, y = self.data.x[start:stop], self.data.y[start:stop]
+                out[0, first:last] = x[starts - start]
+                out[1, first:last] = x[np.minimum(starts - start + PYRAMID_FANOUT, stop - start) - 1]
+                out[2, first:last] = np.minimum.reduceat(y, starts - start)
+                out[3, first:last] = np.maximum.reduceat(y, starts - start)
+                out[4, first:last] = np.add.reduceat(y, starts - start)
+                out[5, first:last] = np.diff(np.append(starts, stop))
+            else:
+                rows = below[:, start:stop]
+                offsets = starts - start
+                out[0, first:last] = rows[0, offsets]
+                out[1, first:last] = rows[1, np.minimum(offsets + PYRAMID_FANOUT, stop - start) - 1]
+                out[2, first:last] = np.minimum.reduceat(rows[2], offsets)
+                out[3, first:last] = np.maximum.reduceat(rows[3], offsets)
+                out[4, first:last] = np.add.reduceat(rows[4], offsets)
+                out[5, first:last] = np.add.reduceat(rows[5], offsets)
+        out.flush()
+        del out  # Windows won't replace a mapped file
+        os.replace(tmp_path, path)
+
+    def view(self, lo, hi, columns):
+        """(x, min, max, mean) of the tiles covering [lo, hi] at about `columns` resolution."""
+        x = self.data.x
+        start, stop = np.searchsorted(x, lo), np.searchsorted(x, hi, side="right")
+        if stop - start <= 2 * columns or not self.levels:
+            # close enough to read the samples themselves
+            start, stop = max(start - 1, 0), min(stop + 1, len(x))
+            y = self.data.y[start:stop]
+            return x[start:stop], y, y, y
+        for level in self.levels:
+            start = np.searchsorted(level[1], lo)
+            stop = np.searchsorted(level[0], hi, side="right")
+            if stop - start <= 2 * columns or level is self.levels[-1]:
+                break
+        tiles = level[:, start:stop]
+        return 0.5 * (tiles[0] + tiles[1]), tiles[2], tiles[3], tiles[4] / tiles[5]
+
+
+def parse_source(text):
+    """A function row's contents: an expression, or "@path" to a CSV/NPY data file."""
+    text = text.strip()
+    if not text.startswith("@"):
+        return parse_expression(text)
+    path = os.path.abspath(os.path.expanduser(text[1:].strip()))
+    try:
+        info = os.stat(path)
+    except OSError as e:
+        raise ValueError(f"Cannot open data file '{path}': {e.strerror}")
+    return _load_sampled_data(text, path, (info.st_mtime_ns, info.st_size))
+
+
+@functools.lru_cache(maxsize=16)
+def _load_sampled_data(source, path, stamp):
+    # names everything derived from this version of the file; the first half is the file's
+    key = "-".join(hashlib.sha256(json.dumps(part).encode()).hexdigest()[:16] for part in (path, stamp))
+    if path.lower().endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        if array.ndim == 2 and array.shape[0] == 2 and array.dtype == np.float64 and array.flags.c_contiguous \
+                and np.all(array[0, 1:] >= array[0, :-1]):
+            return SampledData(source, array, stamp, key)  # already in the mapped layout
+    elif not path.lower().endswith((".csv", ".txt")):
+        raise ValueError(f"Unsupported data file '{os.path.basename(path)}' (use .csv or .npy)")
+
+    os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+    cached = os.path.join(DATA_CACHE_DIR, key + ".npy")
+    if os.path.exists(cached):
+        os.utime(cached)  # keeps data in use at the back of the eviction queue
+    else:
+        _convert_data_file(path, cached)
+    _prune_data_cache(key)
+    return SampledData(source, np.load(cached, mmap_mode="r"), stamp, key)
+
+
+def _prune_data_cache(keep):
+    """Delete older versions of `keep`'s file, then trim DATA_CACHE_DIR oldest-first."""
+    family = keep.split("-")[0] + "-"
+    entries = []
+    for name in os.listdir(DATA_CACHE_DIR):
+        path = os.path.join(DATA_CACHE_DIR, name)
+        if ".tmp" in name:
+            continue  # still being written
+        try:
+            info = os.stat(path)
+            if name.startswith(keep):
+                entries.append((float("inf"), info.st_size, path))  # in use, counted but kept
+            elif name.startswith(family):
+                os.remove(path)  # the same file before it was edited
+            else:
+                entries.append((info.st_mtime, info.st_size, path))
+        except OSError:
+            continue  # gone already, or still mapped (Windows)
+
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= DATA_CACHE_MAX_BYTES or mtime == float("inf"):
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _convert_data_file(path, target):
+    # streams the file in DATA_CHUNK_ROWS pieces into a (2, N) memmap
+    tmp_path = target + ".tmp.npy"
+    if path.lower().endswith(".npy"):
+        source = np.load(path, mmap_mode="r")
+        if source.ndim == 1 or source.ndim == 2 and 1 in source.shape:
+            source = source.reshape(-1)
+            rows = len(source)
+            columns = lambda start, stop: (np.arange(start, stop, dtype=float), source[start:stop])
+        elif source.ndim == 2 and source.shape[0] == 2:
+            rows = source.shape[1]
+            columns = lambda start, stop: (source[0, start:stop], source[1, start:stop])
+        elif source.ndim == 2:
+            rows = source.shape[0]
+            columns = lambda start, stop: (source[start:stop, 0], source[start:stop, 1])
+        else:
+            raise ValueError(f"Expected a 1-D or 2-D array in '{os.path.basename(path)}'")
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(2, rows))
+        for start in range(0, rows, DATA_CHUNK_ROWS):
+            stop = min(start + DATA_CHUNK_ROWS, rows)
+            out[0, start:stop], out[1, start:stop] = columns(start, stop)
+    else:
+        with open(path, "rb") as fh:
+            # an upper bound: blank lines are counted but skipped by loadtxt
+            rows = sum(chunk.count(b"\n") for chunk in iter(lambda: fh.read(1 << 24), b"")) + 1
+        with open(path, "r", encoding="utf-8") as fh:
+            first = fh.readline()
+            delimiter = "," if "," in first else ";" if ";" in first else None
+            fields = first.split(delimiter)
+            try:
+                for field in fields[:2]:
+                    float(field)
+                fh.seek(0)
+            except ValueError:
+                pass  # header line
+            single = len(fields) == 1  # y only, x is the sample index
+            out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(2, rows))
+            filled = 0
+            while True:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)  # "input contained no data" at the end
+                    chunk = np.loadtxt(fh, delimiter=delimiter, usecols=(0,) if single else (0, 1),
+                                       max_rows=DATA_CHUNK_ROWS, ndmin=2)
+                if not len(chunk):
+                    break
+                stop = filled + len(chunk)
+                out[0, filled:stop] = np.arange(filled, stop) if single else chunk[:, 0]
+                out[1, filled:stop] = chunk[:, -1]
+                filled = stop
+        if filled < rows:
+            trimmed = np.lib.format.open_memmap(tmp_path + ".npy", mode="w+", dtype=np.float64, shape=(2, filled))
+            trimmed[:] = out[:, :filled]
+            trimmed.flush()
+            del trimmed, out  # Windows won't replace a mapped file
+            os.replace(tmp_path + ".npy", tmp_path)
+            out, rows = np.lib.format.open_memmap(tmp_path, mode="r+"), filled
+
+    if rows < 2:
+        del out
+        os.remove(tmp_path)
+        raise ValueError(f"Need at least two samples in '{os.path.basename(path)}'")
+    if not np.all(out[0, 1:] >= out[0, :-1]):
+        out[:] = out[:, np.argsort(out[0], kind="stable")]
+    out.flush()
+    del out
+    os.replace(tmp_path, target)
+
+
+def richardson_derivative(f, x_vals, order=1):
+    """Central differences at several steps, Richardson-extrapolated.
+
+    Every stencil point for every step is evaluated in one call to ``f``.
+    Returns the derivative and a per-sample error estimate (the gap between
+    the last two extrapolation levels); each sample keeps the base step whose
+    estimate was smallest. A base step whose gaps don't shrink level by level
+    isn't converging and gets no estimate, so it can't win.
+    """
+    x_vals = np.asarray(x_vals, dtype=float)
+    scale = np.maximum(1.0, np.abs(x_vals))
+    ideal = np.finfo(float).eps ** (1.0 / (order + 2 * RICHARDSON_LEVELS))
+    # relative steps alone reach across whole periods of an oscillation far from 0
+    longest = min(RICHARDSON_MAX_STEP, np.min(np.diff(x_vals))) if len(x_vals) > 1 else RICHARDSON_MAX_STEP
+
+    # steps: (factor, level, sample); stencil: x + (order/2 - k) * h
+    h = np.minimum(np.array(RICHARDSON_STEP_FACTORS)[:, None, None] * ideal * scale[None, None, :], longest)
+    h = h / 2.0 ** np.arange(RICHARDSON_LEVELS)[None, :, None]
+    k = np.arange(order + 1)
+    weights = np.array([(-1) ** j * math.comb(order, j) for j in k], dtype=float)
+    points = x_vals + (order / 2 - k)[:, None, None, None] * h[None]
+
+    with np.errstate(all="ignore"):
+        samples = f(points)
+        table = np.tensordot(weights, samples, axes=1) / h ** order
+        # cancellation error of the finest stencil, so a lucky tiny gap can't win
+        roundoff = np.finfo(float).eps * np.tensordot(np.abs(weights), np.abs(samples), axes=1)[:, -1] / h[:, -1] ** order
+
+        # each level halves the step; central differences only have even powers of h
+        gaps = []
+        for level in range(1, RICHARDSON_LEVELS):
+            factor = 4.0 ** level
+            previous = table
+            gaps.append(np.abs(table[:, -1] - table[:, -2]))
+            table = (factor * table[:, 1:] - table[:, :-1]) / (factor - 1)
+        error = np.abs(table[:, -1] - previous[:, -1]) + 2 * roundoff
+        gaps.append(error)
+        converging = np.all([later <= earlier + 2 * roundoff for earlier, later in zip(gaps, gaps[1:])], axis=0)
+
+    error = np.where(np.isfinite(error) & converging, error, np.inf)
+    best = np.argmin(error, axis=0)
+    columns = np.arange(len(x_vals))
+    values = table[:, -1][best, columns]
+    error = error[best, columns]
+    return values, np.where(np.isfinite(error), error, np.nan)
+
+
+class HyperDual:
+    """Hyper-dual number a + b*e1 + c*e2 + d*e1*e2 (e1**2 == e2**2 == 0) over arrays.
+
+    Seeding b = c = 1 and pushing it through a NumPy function leaves f' in
+    ``b`` and f'' in ``d``, exact to roundoff.
+    """
+
+    __slots__ = ("a", "b", "c", "d")
+
+    def __init__(self, a, b, c, d):
+        self.a, self.b, self.c, self.d = a, b, c, d
+
+    @staticmethod
+    def lift(value):
+        if isinstance(value, HyperDual):
+            return value
+        value = np.asarray(value, dtype=float)
+        zero = np.zeros_like(value)
+        return HyperDual(value, zero, zero, zero)
+
+    def chain(self, g, dg, d2g):
+        return HyperDual(g, dg * self.b, dg * self.c, dg * self.d + d2g * self.b * self.c)
+
+    def __add__(self, other):
+        other = HyperDual.lift(other)
+        return HyperDual(self.a + other.a, self.b + other.b, self.c + other.c, self.d + other.d)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-HyperDual.lift(other))
+
+    def __rsub__(self, other):
+        return HyperDual.lift(other) + (-self)
+
+    def __neg__(self):
+        return HyperDual(-self.a, -self.b, -self.c, -self.d)
+
+    def __pos__(self):
+        return self
+
+    def __mul__(self, other):
+        other = HyperDual.lift(other)
+        return HyperDual(
+            self.a * other.a,
+            self.a * other.b + self.b * other.a,
+            self.a * other.c + self.c * other.a,
+            self.a * other.d + self.b * other.c + self.c * other.b + self.d * other.a
+        )
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        return self.chain(1 / self.a, -1 / self.a ** 2, 2 / self.a ** 3)
+
+    def __truediv__(self, other):
+        return self * HyperDual.lift(other).reciprocal()
+
+    def __rtruediv__(self, other):
+        return HyperDual.lift(other) * self.reciprocal()
+
+    def __pow__(self, other):
+        if isinstance(other, HyperDual):
+            return (other * self.log()).exp()
+        p = float(other)
+        # keep 0 * inf out of the low powers at a == 0
+        dg = p * self.a ** (p - 1) if p != 0 else np.zeros_like(self.a)
+        d2g = p * (p - 1) * self.a ** (p - 2) if p not in (0, 1) else np.zeros_like(self.a)
+        return self.chain(self.a ** p, dg, d2g)
+
+    def __rpow__(self, other):
+        log_base = np.log(float(other))
+        g = float(other) ** self.a
+        return self.chain(g, g * log_base, g * log_base ** 2)
+
+    def sin(self):
+        return self.chain(np.sin(self.a), np.cos(self.a), -np.sin(self.a))
+
+    def cos(self):
+        return self.chain(np.cos(self.a), -np.sin(self.a), -np.cos(self.a))
+
+    def tan(self):
+        t = np.tan(self.a)
+        return self.chain(t, 1 + t ** 2, 2 * t * (1 + t ** 2))
+
+    def exp(self):
+        g = np.exp(self.a)
+        return self.chain(g, g, g)
+
+    def log(self):
+        return self.chain(np.log(self.a), 1 / self.a, -1 / self.a ** 2)
+
+    def sqrt(self):
+        g = np.sqrt(self.a)
+        return self.chain(g, 0.5 / g, -0.25 / (g * self.a))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or kwargs or ufunc.__name__ not in HYPERDUAL_UFUNCS:
+            return NotImplemented
+        return HYPERDUAL_UFUNCS[ufunc.__name__](*inputs)
+
+
+# operands are lifted first, otherwise e.g. np.float64 * HyperDual would bounce back here
+HYPERDUAL_UFUNCS = {
+    "add": lambda a, b: HyperDual.lift(a) + b,
+    "subtract": lambda a, b: HyperDual.lift(a) - b,
+    "multiply": lambda a, b: HyperDual.lift(a) * b,
+    "divide": lambda a, b: HyperDual.lift(a) / b,
+    "true_divide": lambda a, b: HyperDual.lift(a) / b,
+    "power": lambda a, b: a ** b if isinstance(a, HyperDual) else b.__rpow__(a),
+    "negative": HyperDual.__neg__, "positive": HyperDual.__pos__,
+    "sin": HyperDual.sin, "cos": HyperDual.cos, "tan": HyperDual.tan,
+    "exp": HyperDual.exp, "log": HyperDual.log, "sqrt": HyperDual.sqrt
+}
+
+
+def ad_derivative(f, x_vals, order=1):
+    """Forward-mode derivative: complex step for f', hyper-dual numbers for f''.
+
+    Returns None for orders above 2.
+    """
+    x_vals = np.asarray(x_vals, dtype=float)
+    with np.errstate(all="ignore"):
+        real = f(x_vals)
+        if order == 1:
+            # no subtraction, so no cancellation: exact for analytic f
+            values = np.imag(f(x_vals + 1j * COMPLEX_STEP)) / COMPLEX_STEP
+        elif order == 2:
+            ones, zeros = np.ones_like(x_vals), np.zeros_like(x_vals)
+            result = f(HyperDual(x_vals, ones, ones, zeros))
+            values = result.d if isinstance(result, HyperDual) else zeros
+        else:
+            return None
+
+    values = np.broadcast_to(np.asarray(values, dtype=float), x_vals.shape)
+    # off the real domain (log/sqrt of negatives) the complex evaluation still returns numbers
+    return np.where(np.isfinite(real), values, np.nan)
+
+
+def taylor_derivatives(function, x_vals, order):
+    """All derivatives 0..order of a parsed expression in one pass.
+
+    Truncated Taylor coefficients (jets, shape ``(order + 1, len(x_vals))``)
+    are pushed through the expression tree, so there is no symbolic
+    expression swell and no differencing noise. Products cost O(order**2)
+    per sample, everything else is linear in the number of nodes.
+    """
+    x_vals = np.asarray(x_vals, dtype=float)
+    x_jet = np.zeros((order + 1, len(x_vals)))
+    x_jet[0] = x_vals
+    if order:
+        x_jet[1] = 1.0
+
+    with np.errstate(all="ignore"):
+        jet = _jet_node(function.tree, x_jet)
+    factorials = np.array([math.factorial(k) for k in range(order + 1)], dtype=float)
+    derivatives = jet * factorials[:, None]
+    return np.where(np.isfinite(derivatives[0]), derivatives, np.nan)
+
+
+def _jet_constant(value, like):
+    jet = np.zeros_like(like)
+    jet[0] = value
+    return jet
+
+
+def _jet_mul(a, b):
+    c = np.zeros_like(a)
+    for k in range(len(a)):
+        for j in range(k + 1):
+            c[k] += a[j] * b[k - j]
+    return c
+
+
+def _jet_div(a, b):
+    c = np.zeros_like(a)
+    for k in range(len(a)):
+        acc = a[k].copy()
+        for j in range(1, k + 1):
+            acc -= b[j] * c[k - j]
+        c[k] = acc / b[0]
+    return c
+
+
+def _jet_exp(a):
+    e = np.zeros_like(a)
+    e[0] = np.exp(a[0])
+    for k in range(1, len(a)):
+        for j in range(1, k + 1):
+            e[k] += j * a[j] * e[k - j]
+        e[k] /= k
+    return e
+
+
+def _jet_log(a):
+    g = np.zeros_like(a)
+    g[0] = np.log(a[0])
+    for k in range(1, len(a)):
+        acc = k * a[k]
+        for j in range(1, k):
+            acc = acc - a[j] * (k - j) * g[k - j]
+        g[k] = acc / (k * a[0])
+    return g
+
+
+def _jet_sin_cos(a):
+    s, c = np.zeros_like(a), np.zeros_like(a)
+    s[0], c[0] = np.sin(a[0]), np.cos(a[0])
+    for k in range(1, len(a)):
+        for j in range(1, k + 1):
+            s[k] += j * a[j] * c[k - j]
+            c[k] -= j * a[j] * s[k - j]
+        s[k] /= k
+        c[k] /= k
+    return s, c
+
+
+def _jet_sqrt(a):
+    r = np.zeros_like(a)
+    r[0] = np.sqrt(a[0])
+    for k in range(1, len(a)):
+        acc = a[k].copy()
+        for j in range(1, k):
+            acc -= r[j] * r[k - j]
+        r[k] = acc / (2 * r[0])
+    return r
+
+
+def _jet_pow(a, p):
+    if p == int(p) and 0 <= p <= MAX_POLY_DEGREE:
+        # repeated squaring stays finite where a[0] == 0
+        result, base, n = _jet_constant(1.0, a), a, int(p)
+        while n:
+            if n & 1:
+                result = _jet_mul(result, base)
+            n >>= 1
+            if n:
+                base = _jet_mul(base, base)
+        return result
+
+    # from a * y' == p * a' * y
+    y = np.zeros_like(a)
+    y[0] = a[0] ** p
+    for k in range(1, len(a)):
+        for j in range(1, k + 1):
+            y[k] += (p * j - (k - j)) * a[j] * y[k - j]
+        y[k] /= k * a[0]
+    return y
+
+
+def _jet_node(node, x_jet):
+    if isinstance(node, ast.BinOp):
+        left = _jet_node(node.left, x_jet)
+        op = type(node.op)
+        if op is ast.Pow:
+            exponent = _poly_node(node.right)
+            if exponent is not None and len(exponent) == 1:
+                return _jet_pow(left, exponent[0])
+            right = _jet_node(node.right, x_jet)
+            return _jet_exp(_jet_mul(right, _jet_log(left)))
+        right = _jet_node(node.right, x_jet)
+        if op is ast.Add:
+            return left + right
+        if op is ast.Sub:
+            return left - right
+        if op is ast.Mult:
+            return _jet_mul(left, right)
+        return _jet_div(left, right)
+    if isinstance(node, ast.UnaryOp):
+        operand = _jet_node(node.operand, x_jet)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Call):
+        arg = _jet_node(node.args[0], x_jet)
+        name = node.func.id
+        if name in ("sin", "cos", "tan"):
+            s, c = _jet_sin_cos(arg)
+            return s if name == "sin" else c if name == "cos" else _jet_div(s, c)
+        if name == "exp":
+            return _jet_exp(arg)
+        if name == "log":
+            return _jet_log(arg)
+        return _jet_sqrt(arg)
+    if isinstance(node, ast.Name):
+        if node.id == "x":
+            return x_jet
+        return _jet_constant(PARSER_CONSTANTS[node.id][0], x_jet)
+    return _jet_constant(float(node.value), x_jet)
+
+
+@functools.lru_cache(maxsize=32)
+def spectral_coefficients(f, x_range):
+    """One-sided spectrum of f over [x_min, x_max), treated as one period.
+
+    Returns None when the spectrum does not decay to SPECTRAL_TOLERANCE at
+    any of SPECTRAL_SIZES, i.e. f is not smooth and periodic over the range.
+    """
+    x_min, x_max = x_range
+    for n in SPECTRAL_SIZES:
+        grid = x_min + (x_max - x_min) * np.arange(n) / n
+        with np.errstate(all="ignore"):
+            y_vals = np.broadcast_to(f(grid), grid.shape)
+        if not np.all(np.isfinite(y_vals)):
+            return None
+        coeffs = np.fft.rfft(y_vals) / n
+        scale = np.max(np.abs(coeffs))
+        tail = np.max(np.abs(coeffs[-(len(coeffs) // 8):]))
+        if scale == 0 or tail <= SPECTRAL_TOLERANCE * scale:
+            return coeffs
+    return None
+
+
+def _spectral_series(spectrum, x_range, x_vals):
+    # every mode but the mean and the Nyquist one stands for a conjugate pair
+    weights = np.full(len(spectrum), 2.0)
+    weights[0] = weights[-1] = 1.0
+    wavenumbers = 2 * np.pi / (x_range[1] - x_range[0]) * np.arange(len(spectrum))
+    phases = np.exp(1j * np.outer(np.asarray(x_vals) - x_range[0], wavenumbers))
+    return (phases @ (weights * spectrum)).real
+
+
+def spectral_derivative(coeffs, x_range, x_vals, order):
+    wavenumbers = 2 * np.pi / (x_range[1] - x_range[0]) * np.arange(len(coeffs))
+    spectrum = coeffs * (1j * wavenumbers) ** order
+    if order % 2:
+        spectrum[-1] = 0  # the Nyquist mode has no odd derivative on the grid
+    return _spectral_series(spectrum, x_range, x_vals)
+
+
+def spectral_integral(coeffs, x_range, x_vals):
+    wavenumbers = 2 * np.pi / (x_range[1] - x_range[0]) * np.arange(len(coeffs))
+    spectrum = np.zeros_like(coeffs)
+    spectrum[1:] = coeffs[1:] / (1j * wavenumbers[1:])
+    # the mean integrates to a ramp, the rest stays periodic
+    values = coeffs[0].real * (np.asarray(x_vals) - x_range[0]) + _spectral_series(spectrum, x_range, x_vals)
+    return values - values[0]
+
+
+@functools.lru_cache(maxsize=256)
+def function_structure(function):
+    """(period, parity) of a parsed expression, read off its SymPy tree.
+
+    ``period`` is None for aperiodic input and ``parity`` is "even", "odd" or
+    None. Both are spot-checked numerically before being trusted.
+    """
+    if function.poly is not None:
+        # a polynomial is never periodic; parity shows in the coefficients
+        degrees = np.arange(len(function.poly))[::-1]
+        nonzero = function.poly != 0
+        if np.all(degrees[nonzero] % 2 == 0):
+            return None, "even"
+        if np.all(degrees[nonzero] % 2 == 1):
+            return None, "odd"
+        return None, None
+
+    x = sp.Symbol('x')
+    expr = function.sympy
+    probe = np.linspace(0.1, 3.7, 16)
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(function(probe), probe.shape)
+
+    period = None
+    try:
+        found = sp.periodicity(expr, x)
+        if found is not None and found.is_positive and found.is_finite:
+            candidate = float(found)
+            with np.errstate(all="ignore"):
+                shifted = np.broadcast_to(function(probe + candidate), probe.shape)
+            if np.allclose(shifted, values, rtol=1e-9, atol=1e-12, equal_nan=True):
+                period = candidate
+    except Exception as e:
+        print(f"Periodicity check failed: {e}")
+
+    parity = None
+    try:
+        mirrored = expr.subs(x, -x)
+        with np.errstate(all="ignore"):
+            reflected = np.broadcast_to(function(-probe), probe.shape)
+        if sp.expand(mirrored - expr) == 0 and np.allclose(reflected, values, equal_nan=True):
+            parity = "even"
+        elif sp.expand(mirrored + expr) == 0 and np.allclose(reflected, -values, equal_nan=True):
+            parity = "odd"
+    except Exception as e:
+        print(f"Symmetry check failed: {e}")
+
+    return period, parity
+
+
+def bracket_roots(g, lo, hi, samples=1024):
+    """Roots of g in [lo, hi) from sign changes on a grid, polished with brentq."""
+    grid = np.linspace(lo, hi, samples + 1)
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(g(grid), grid.shape)
+    roots = list(grid[:-1][values[:-1] == 0])
+    scale = np.nanmax(np.abs(values)) if np.any(np.isfinite(values)) else 1.0
+    for i in np.nonzero(np.sign(values[:-1]) * np.sign(values[1:]) < 0)[0]:
+        try:
+            root = brentq(lambda t: float(g(np.array([t]))[0]), grid[i], grid[i + 1])
+        except ValueError:
+            continue
+        # a sign change across a pole (tan) is not a root
+        if root < hi and abs(float(g(np.array([root]))[0])) <= 1e-8 * max(1.0, scale):
+            roots.append(root)
+    return np.sort(np.array(roots, dtype=float))
+
+
+def replicate_periodic(points, period, x_range):
+    """Copies of one period's points (found in [x_min, x_min + period)) across x_range."""
+    copies = [points + k * period for k in range(int((x_range[1] - x_range[0]) // period) + 1)]
+    points = np.concatenate(copies) if copies else np.array([])
+    return points[(points >= x_range[0]) & (points <= x_range[1])]
+
+
+def batch_bisect(g, lo, hi, lo_sign):
+    """Bisect many sign-change brackets of g at once, down to roundoff in x.
+
+    g maps an array of points (one per bracket) to values; lo_sign is the
+    sign of g at each lo.
+    """
+    if not len(lo):
+        return lo
+    tolerance = 1e-15 * max(np.max(np.abs(lo)), np.max(np.abs(hi)), 1.0)
+    steps = int(np.ceil(np.log2(max(np.max(hi - lo), tolerance) / tolerance)))
+    with np.errstate(all="ignore"):
+        for _ in range(steps):
+            mid = 0.5 * (lo + hi)
+            same = np.sign(g(mid)) == lo_sign
+            lo = np.where(same, mid, lo)
+            hi = np.where(same, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+def pairwise_intersections(functions, x_range, samples=INTERSECTION_SAMPLES):
+    """Crossings of every pair of functions on x_range, as (i, j, x, y) rows with i < j.
+
+    All curves are sampled once; the k x k x N difference cube is scanned for
+    sign changes and every bracket is bisected together, one vectorised
+    evaluation per function and step.
+    """
+    k = len(functions)
+    if k < 2:
+        return []
+    x_vals = np.linspace(x_range[0], x_range[1], samples + 1)
+    with np.errstate(all="ignore"):
+        y_vals = np.stack([np.broadcast_to(f(x_vals), x_vals.shape) for f in functions]).astype(float)
+
+    upper_i, upper_j = np.triu_indices(k, 1)
+    differences = (y_vals[:, None, :] - y_vals[None, :, :])[upper_i, upper_j]
+    signs = np.sign(differences)
+    signs[np.all(signs == 0, axis=1)] = np.nan  # the same curve twice crosses nowhere
+    pair, cell = np.nonzero(signs[:, :-1] * signs[:, 1:] < 0)
+    touch_pair, touch_cell = np.nonzero(signs == 0)
+
+    lo, hi = x_vals[cell], x_vals[cell + 1]
+    lo_sign = signs[pair, cell]
+    first, second = upper_i[pair], upper_j[pair]
+
+    def gap(points):
+        # f_i - f_j at each bracket's own point, one call per function;
+        # first < second, so f_i is always written before f_j is subtracted
+        values = np.empty_like(points)
+        for m in range(k):
+            take_first, take_second = first == m, second == m
+            if take_first.any():
+                values[take_first] = functions[m](points[take_first])
+            if take_second.any():
+                values[take_second] -= functions[m](points[take_second])
+        return values
+
+    roots = batch_bisect(gap, lo, hi, lo_sign)
+    with np.errstate(all="ignore"):
+        residual = np.abs(gap(roots))
+
+    # a sign change across a pole (tan) is not a crossing
+    scale = np.nanmax(np.abs(y_vals[np.isfinite(y_vals)]), initial=1.0)
+    keep = residual <= 1e-8 * max(1.0, scale)
+
+    rows = [(upper_i[p], upper_j[p], x_vals[c]) for p, c in zip(touch_pair, touch_cell)]
+    rows += [(first[n], second[n], roots[n]) for n in np.nonzero(keep)[0]]
+    rows.sort(key=lambda row: (row[0], row[1], row[2]))
+    return [
+        (int(i), int(j), float(x), float(np.asarray(functions[i](np.array([x]))).ravel()[0]))
+        for i, j, x in rows
+    ]
+
+
+def shape_analysis(functions, x_vals, first, second):
+    """Monotonicity and concavity intervals and inflection points of k curves.
+
+    first and second are (k, N) samples of f' and f'' on x_vals. Sign changes
+    of both are found in a single sweep over the stacked (k, 2, N) array and
+    then bisected together on exact Taylor-jet derivatives (the smoothed
+    derivatives for measured data). Returns one dict
+    per curve with "increasing", "decreasing", "concave_up" and
+    "concave_down" lists of (a, b) and an "inflections" list of (x, y).
+    """
+    k = len(functions)
+    rows = np.stack([first, second], axis=1).astype(float)
+    finite = np.isfinite(rows)
+    magnitude = np.where(finite, np.abs(rows), 0.0)
+    # the typical size, not the largest: near a pole (tan) the maximum is
+    # huge and would round every ordinary sample down to zero
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-nan rows
+        scale = np.nan_to_num(np.nanmedian(np.where(finite, magnitude, np.nan), axis=-1))
+    scale = np.where(scale > 0, scale, magnitude.max(axis=-1))
+    signs = np.where(magnitude > SHAPE_TOLERANCE * scale[..., None], np.sign(np.where(finite, rows, 0.0)), 0.0)
+
+    # carry the last nonzero sample forward so a flat stretch between a
+    # positive and a negative run still brackets the change
+    positions = np.broadcast_to(np.arange(len(x_vals)), signs.shape)
+    last_nonzero = np.maximum.accumulate(np.where(signs != 0, positions, 0), axis=-1)
+    carried = np.take_along_axis(signs, last_nonzero, axis=-1)
+    curve, kind, cell = np.nonzero(carried[..., :-1] * signs[..., 1:] < 0)
+
+    lo, hi = x_vals[last_nonzero[curve, kind, cell]], x_vals[cell + 1]
+    lo_sign = carried[curve, kind, cell]
+
+    def derivative(points):
+        # f' or f'' at each bracket's point, one jet pass per function
+        values = np.empty_like(points)
+        for m in range(k):
+            take = curve == m
+            if not take.any():
+                continue
+            if isinstance(functions[m], SampledData):
+                row = kind[take]
+                values[take] = np.where(row == 0, functions[m].derivative(points[take], 1),
+                                        functions[m].derivative(points[take], 2))
+            else:
+                jets = taylor_derivatives(functions[m], points[take], 2)
+                values[take] = jets[kind[take] + 1, np.arange(take.sum())]
+        return values
+
+    changes = batch_bisect(derivative, lo, hi, lo_sign)
+    with np.errstate(all="ignore"):
+        residual = np.abs(derivative(changes)) if len(changes) else changes
+    # across a pole (tan) the sign flips but the derivative blows up instead
+    genuine = residual <= SHAPE_TOLERANCE * scale[curve, kind]
+
+    names = (("increasing", "decreasing"), ("concave_up", "concave_down"))
+    results = []
+    for m in range(k):
+        result = {"inflections": []}
+        for row in (0, 1):
+            take = (curve == m) & (kind == row)
+            edges = np.concatenate([[x_vals[0]], changes[take], [x_vals[-1]]])
+            if take.any():
+                # each interval has the sign its closing change flips away from
+                interval_signs = np.concatenate([lo_sign[take], -lo_sign[take][-1:]])
+            else:
+                # no change at all: the first nonzero sample decides, if any
+                interval_signs = signs[m, row][signs[m, row] != 0][:1]
+            for name in names[row]:
+                result[name] = []
+            for a, b, sign in zip(edges[:-1], edges[1:], interval_signs):
+                result[names[row][0] if sign > 0 else names[row][1]].append((float(a), float(b)))
+        inflection_x = changes[(curve == m) & (kind == 1) & genuine]
+        if len(inflection_x):
+            result["inflections"] = [(float(x), float(y)) for x, y in zip(inflection_x, functions[m](inflection_x))]
+        results.append(result)
+    return results
+
+
+def critical_points(function, x_range):
+    if isinstance(function, SampledData):
+        lo, hi = max(x_range[0], function.x[0]), min(x_range[1], function.x[-1])
+        points = bracket_roots(lambda t: function.derivative(t, 1), lo, hi) if lo < hi else []
+        return [
+            {'x': float(px), 'y': float(py), 'derivative': float(dy)}
+            for px, py, dy in zip(points, function(points), function.derivative(points, 1))
+        ]
+
+    if function.poly is not None:
+        derivative = np.polyder(function.poly)
+        points = polynomial_real_roots(derivative)
+        points = points[(points >= x_range[0]) & (points <= x_range[1])]
+        return [
+            {'x': float(px), 'y': float(horner(function.poly, px)), 'derivative': float(horner(derivative, px))}
+            for px in points
+        ]
+
+    period, _ = function_structure(function)
+    if period is not None and x_range[1] - x_range[0] >= MIN_PERIODS_TO_TILE * period:
+        slope = lambda t: taylor_derivatives(function, t, 1)[1]
+        points = replicate_periodic(bracket_roots(slope, x_range[0], x_range[0] + period), period, x_range)
+        if len(points) == 0:
+            return []
+        y_vals, slopes = taylor_derivatives(function, points, 1)
+        return [
+            {'x': float(px), 'y': float(py), 'derivative': float(dy)}
+            for px, py, dy in zip(points, y_vals, slopes)
+        ]
+
+    try:
+        x = sp.Symbol('x')
+        expr = function.sympy
+
+        derivative = sp.diff(expr, x)
+
+        critical_points = sp.nroots(derivative)
+
+        valid_critical_points = [
+            point for point in critical_points 
+            if x_range[0] <= float(point.evalf()) <= x_range[1] and sp.im(point) == 0
+        ]
+
+        if not valid_critical_points:
+            return []
+
+        critical_values = []
+        for point in valid_critical_points:
+            point_val = float(point.evalf())
+            func_val = float(expr.subs(x, point))
+            derivative_val = float(derivative.subs(x, point))
+
+            critical_values.append({
+                'x': point_val,
+                'y': func_val,
+                'derivative': derivative_val
+            })
+
+        return critical_values
+    except Exception as e:
+        print(f"Critical Value Error: {e}")
+        return []
+
+
+def function_roots(function, x_range=None):
+    if isinstance(function, SampledData):
+        lo, hi = function.x[0], function.x[-1]
+        if x_range is not None:
+            lo, hi = max(x_range[0], lo), min(x_range[1], hi)
+        # zeros of the smoothed signal, not of every noisy wiggle
+        smoothed = lambda t: function.derivative(t, 0)
+        return [float(root) for root in bracket_roots(smoothed, lo, hi)] if lo < hi else []
+
+    if function.poly is not None:
+        if not np.any(function.poly):
+            return []  # identically zero, every x is a root
+        return [float(root) for root in polynomial_real_roots(function.poly)]
+
+    if x_range is not None:
+        period, _ = function_structure(function)
+        if period is not None and x_range[1] - x_range[0] >= MIN_PERIODS_TO_TILE * period:
+            # search one period, then replicate
+            roots = bracket_roots(function, x_range[0], x_range[0] + period)
+            return [float(root) for root in replicate_periodic(roots, period, x_range)]
+
+    x = sp.Symbol('x')
+    expr = function.sympy
+
+    # Use multiple strategies for root finding
+    try:
+        # First, try analytical solving
+        roots = sp.solve(expr, x)
+    except Exception:
+        roots = []
+
+    # If analytical solving fails, use numerical methods
+    if not roots:
+        # Create a numerical function from the symbolic expression
+        def f(val):
+            return float(expr.subs(x, val))
+
+        # Use scipy for numerical root finding
+        from scipy.optimize import brentq
+        roots = []
+
+        # Try to find roots in a reasonable range
+        try:
+            # Assuming we want roots in the visible range
+            root = brentq(f, -10, 10)
+            roots.append(root)
+        except ValueError:
+            # No roots found in the given range
+            pass
+
+    # Filter and convert roots
+    valid_roots = []
+    for root in roots:
+        try:
+            # Convert to float and check if real
+            root_val = float(root)
+            valid_roots.append(root_val)
+        except Exception:
+            pass
+
+    return valid_roots
+
+
+def export_curves(path, columns):
+    """Write the curve columns as .npy, .npz, .csv or .parquet, picked by extension.
+
+    Nothing row-shaped is built in memory: NPZ and Parquet take the result
+    arrays as they are, NPY is a structured memmap filled one column at a
+    time, and CSV is formatted DATA_CHUNK_ROWS rows at a time.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    names = list(columns)
+    if extension == ".npz":
+        np.savez(path, **columns)
+    elif extension == ".npy":
+        table = np.lib.format.open_memmap(path, mode="w+", dtype=[(name, "f8") for name in names],
+                                          shape=(len(columns["x"]),))
+        for name in names:
+            table[name] = columns[name]
+        table.flush()
+        del table
+    elif extension == ".parquet":
+        if pa is None:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+        pq.write_table(pa.table(columns), path)
+    elif extension == ".csv":
+        with open(path, "w", newline="") as fh:
+            fh.write(",".join('"' + name.replace('"', '""') + '"' for name in names) + "\n")
+            for start in range(0, len(columns["x"]), DATA_CHUNK_ROWS):
+                chunk = np.column_stack([columns[name][start:start + DATA_CHUNK_ROWS] for name in names])
+                np.savetxt(fh, chunk, fmt="%.17g", delimiter=",")
+    else:
+        raise ValueError(f"Unsupported export format: {extension or path}")
+
+
+def analyze_curve(curve, x_range):
+    """Roots, critical points and statistics for one report page.
+
+    Curves that come without samples (the critical-values view keeps none)
+    are sampled here with ``sample_curve``.
+    """
+    analysis = {"roots": [], "critical_values": []}
+    try:
+        function = parse_source(curve["expr"])
+        if "values" not in curve:
+            x_vals = np.linspace(x_range[0], x_range[1], PLOT_SAMPLES)
+            curve = sample_curve(curve["expr"], function, x_vals, curve["order"])
+        roots = function_roots(function, x_range)
+        analysis["roots"] = [root for root in roots if x_range[0] <= root <= x_range[1]]
+        analysis["critical_values"] = critical_points(function, x_range)
+    except Exception as e:
+        print(f"Report Analysis Error: {e}")
+    analysis["curve"] = curve
+    if "values" in curve:
+        values, integral = curve["values"], curve["integral"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # nothing finite to reduce
+            analysis["statistics"] = [
+                ("Max Value", np.nanmax(values)), ("Min Value", np.nanmin(values)),
+                ("Mean Value", np.nanmean(values)), ("Standard Deviation", np.nanstd(values)),
+                ("Area Under Curve", integral[-1] - integral[0]),
+            ]
+    return analysis
+
+
+def _report_page(title):
+    page = matplotlib.figure.Figure(figsize=REPORT_PAGE_SIZE)
+    page.text(0.08, 0.95, title, fontsize=15, weight="bold", wrap=True)
+    return page
+
+
+def _report_table(page, x, y, heading, rows, width=90):
+    # a heading and up to REPORT_TABLE_ROWS lines of monospace text, top at y; returns the y below it
+    rows = [line for row in rows for line in textwrap.wrap(row, width, subsequent_indent="    ")] or ["None"]
+    if len(rows) > REPORT_TABLE_ROWS:
+        rows = rows[:REPORT_TABLE_ROWS - 1] + [f"... and {len(rows) - REPORT_TABLE_ROWS + 1} more lines"]
+    page.text(x, y, heading, fontsize=11, weight="bold", va="top")
+    page.text(x, y - 0.025, "\n".join(rows), fontsize=9, family="monospace", va="top", linespacing=1.4)
+    return y - 0.05 - 0.015 * len(rows)
+
+
+def report_summary_page(report):
+    page = _report_page("DerivaPlot Function Analysis Report")
+    lines = [f"Function {i + 1}: {data['expr']}" for i, data in enumerate(report["functions"])]
+    lines.append(f"X Range: [{report['x_range'][0]}, {report['x_range'][1]}]")
+    if "order" in report:
+        lines.append(f"Derivative Order: {report['order']}")
+    lines.append(f"Date: {np.datetime64('today')}")
+    page.text(0.08, 0.9, "\n".join(lines), fontsize=11, va="top", linespacing=1.6)
+
+    y = 0.87 - 0.021 * len(lines)
+    if "intersections" in report:
+        y = _report_table(page, 0.08, y, "Intersections", [
+            f"{point['pair'][0]} = {point['pair'][1]} at x={point['x']:.4f}, y={point['y']:.4f}"
+            for point in report["intersections"]
+        ])
+    if "shape" in report:
+        _report_table(page, 0.08, y, "Inflection Points", [
+            f"{shape['expr']}: " + (", ".join(f"x={x:.4f}" for x, _ in shape["inflections"]) or "None")
+            for shape in report["shape"]
+        ])
+    page.text(0.08, 0.04, "Thank you for using DerivaPlot", fontsize=9)
+    return page
+
+
+def report_function_page(index, analysis):
+    curve = analysis["curve"]
+    page = _report_page(f"Function {index + 1}: {curve['expr']}")
+    if "values" in curve:
+        axes = page.subplots(3, 1, sharex=True, gridspec_kw=dict(top=0.9, bottom=0.42, hspace=0.12))
+        colors = PLOT_COLORS
+        panels = (("values", "f(x)", "solid"), ("derivative", f"Order {curve['order']} derivative", "dashed"),
+                  ("integral", "Integral", "dotted"))
+        for ax, (key, label, style), color in zip(axes, panels, colors):
+            ax.plot(curve["x"], curve[key], color=color, linestyle=style, linewidth=1.5)
+            ax.set_ylabel(label, fontsize=9)
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(labelsize=8)
+        if analysis["roots"]:
+            axes[0].scatter(analysis["roots"], np.zeros(len(analysis["roots"])), color="black", s=15, zorder=5)
+        if analysis["critical_values"]:
+            axes[0].scatter([point["x"] for point in analysis["critical_values"]],
+                            [point["y"] for point in analysis["critical_values"]], color="red", s=25, zorder=5)
+        axes[-1].set_xlabel("x")
+
+        _report_table(page, 0.08, 0.36, "Statistics",
+                      [f"{name:<20}{value:>12.4g}" for name, value in analysis["statistics"]], width=45)
+    _report_table(page, 0.08, 0.2, "Roots", [f"x = {root:.6g}" for root in analysis["roots"]], width=45)
+    _report_table(page, 0.5, 0.36, "Critical Values", [
+        f"x={point['x']:<10.4g} y={point['y']:<10.4g} f'={point['derivative']:.2g}"
+        for point in analysis["critical_values"]
+    ], width=45)
+    return page
+
+
+def render_pdf_report(path, report, curves, figure):
+    """Write the analysis report as a multi-page vector PDF.
+
+    A summary page and the graph come first, then one page per function
+    with its curves, statistics, roots and critical values. The analyses
+    run on REPORT_WORKERS threads a few functions ahead of the writer, and
+    each page is drawn, appended to the file and dropped before the next,
+    so memory does not grow with the number of functions.
+    """
+    x_range = report["x_range"]
+    with PdfPages(path) as pdf, ThreadPoolExecutor(REPORT_WORKERS) as pool:
+        pdf.savefig(report_summary_page(report))
+        if figure is not None:
+            pdf.savefig(figure)
+        pending = collections.deque()
+        for index, curve in enumerate(curves):
+            pending.append((index, pool.submit(analyze_curve, curve, x_range)))
+            while pending and (len(pending) > REPORT_WORKERS or index == len(curves) - 1):
+                done, future = pending.popleft()
+                pdf.savefig(report_function_page(done, future.result()))
+
+
+def sample_curve(expr, function, x_vals, order, integral_engine=None):
+    """A report curve computed without the app: exact derivatives where possible.
+
+    Polynomials use their coefficients and expressions their Taylor jets;
+    measured data is smoothed as in the plot. The integral is the closed
+    form when ``integral_engine`` has one, otherwise cumulative quadrature.
+    """
+    x_vals = np.asarray(x_vals, dtype=float)
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(function(x_vals), x_vals.shape).astype(float)
+        integral = None
+        if isinstance(function, SampledData):
+            derivative, integral = function.derivative(x_vals, order), function.integral(x_vals)
+        elif function.poly is not None:
+            derivative = horner(np.polyder(function.poly, order), x_vals)
+            antiderivative = np.polyint(function.poly)
+            integral = horner(antiderivative, x_vals) - horner(antiderivative, x_vals[0])
+        else:
+            derivative = taylor_derivatives(function, x_vals, order)[order]
+            kernel = integral_engine.antiderivative(function) if integral_engine is not None else None
+            if kernel is not None:
+                try:
+                    integral = np.broadcast_to(np.asarray(kernel(x_vals), dtype=float), x_vals.shape)
+                    integral = integral - integral[0]
+                    if not np.all(np.isfinite(integral[np.isfinite(values)])):
+                        integral = None
+                except Exception as e:
+                    print(f"Antiderivative evaluation error: {e}")
+                    integral = None
+        if integral is None:
+            finite = np.where(np.isfinite(values), values, 0.0)
+            integral = cumulative_trapezoid(finite, x_vals, initial=0)
+    return {"expr": expr, "x": x_vals, "order": order, "values": values,
+            "derivative": derivative, "integral": integral}
+
+
+def plot_curves_figure(curves):
+    """The main graph (functions, derivatives, integrals) on a standalone Agg figure."""
+    figure = matplotlib.figure.Figure(figsize=(8, 5))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    colors = PLOT_COLORS
+    for i, curve in enumerate(curves):
+        if len(curves) == 1:
+            base_color, derivative_color, integral_color = colors[0], colors[1], colors[2]
+        else:
+            base_color = derivative_color = integral_color = colors[i % len(colors)]
+        expr, x_vals = curve["expr"], curve["x"]
+        ax.plot(x_vals, curve["values"], label=f'Function: {expr}', color=base_color, linewidth=2)
+        ax.plot(x_vals, curve["derivative"], label=f'{curve["order"]}-Order Derivative of {expr}',
+                color=derivative_color, linestyle='dashed', linewidth=1.5)
+        ax.plot(x_vals, curve["integral"], label=f'Integral of {expr}',
+                color=integral_color, linestyle='dotted', linewidth=1.5)
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    ax.set_title('Functions, Derivatives, and Integrals')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    figure.tight_layout()
+    return figure
+
+
+def apply_theme(figure, theme):
+    """Color the figure, every axes and every legend from one THEMES bundle."""
+    background, text = theme["background"], theme["text"]
+    figure.patch.set_facecolor(background)
+    for ax in figure.get_axes():
+        ax.set_facecolor(background)
+        ax.tick_params(colors=text)
+        ax.xaxis.label.set_color(text)
+        ax.yaxis.label.set_color(text)
+        ax.title.set_color(text)
+        for spine in ax.spines.values():
+            spine.set_edgecolor(text)
+        legend = ax.get_legend()
+        if legend is not None:
+            frame = legend.get_frame()
+            frame.set_facecolor(background)
+            frame.set_edgecolor(text)
+            for label in legend.get_texts():
+                label.set_color(text)
+
+
+_batch_integral_engine = None
+
+
+def _init_batch_worker(cache_dir):
+    # every worker reads and fills the same on-disk kernel cache
+    global _batch_integral_engine
+    _batch_integral_engine = IntegralEngine(CompileCache(cache_dir))
+
+
+def build_batch_report(job):
+    """Render one manifest entry in a worker process; returns (name, path, error)."""
+    try:
+        x_range = job["x_range"]
+        x_vals = np.linspace(x_range[0], x_range[1], PLOT_SAMPLES)
+        curves = [sample_curve(expr, parse_source(expr), x_vals, job["order"], _batch_integral_engine)
+                  for expr in job["functions"]]
+        report = {"functions": [{"expr": expr} for expr in job["functions"]],
+                  "x_range": x_range, "order": job["order"]}
+        figure = plot_curves_figure(curves)
+        if job["path"].lower().endswith(".pdf"):
+            render_pdf_report(job["path"], report, curves, figure)
+        else:
+            render_image_report(job["path"], report, figure)
+        return job["name"], job["path"], None
+    except Exception as e:
+        return job["name"], job["path"], str(e)
+
+
+def load_batch_manifest(manifest_path):
+    """Report jobs from a JSON manifest.
+
+    The manifest is a list of reports, or an object with "reports" and
+    optionally "output" (a directory, relative to the manifest) and
+    "format" ("pdf", "png" or "jpg"). Each report needs "functions" and
+    "x_range" and may give "name" and "order".
+    """
+    with open(manifest_path, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if isinstance(manifest, list):
+        manifest = {"reports": manifest}
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    output = os.path.join(base, manifest.get("output", f"{stem}_reports"))
+    extension = manifest.get("format", "pdf").lower().lstrip(".")
+    if extension not in ("pdf", "png", "jpg"):
+        raise ValueError(f"Unsupported report format: {extension}")
+
+    jobs = []
+    for number, entry in enumerate(manifest.get("reports", []), start=1):
+        functions = entry.get("functions")
+        if isinstance(functions, str):
+            functions = [functions]
+        x_range = entry.get("x_range")
+        if not functions or not isinstance(x_range, (list, tuple)) or len(x_range) != 2:
+            raise ValueError(f"Report {number} needs \"functions\" and a two-value \"x_range\"")
+        x_range = (float(x_range[0]), float(x_range[1]))
+        if x_range[0] >= x_range[1]:
+            raise ValueError(f"Report {number}: the minimum x value must be less than the maximum")
+        name = str(entry.get("name", f"report_{number}"))
+        file_name = "".join(c if c.isalnum() or c in "-_ " else "_" for c in name).strip() or f"report_{number}"
+        jobs.append({"name": name, "functions": [str(f) for f in functions], "x_range": x_range,
+                     "order": int(entry.get("order", 1)),
+                     "path": os.path.join(output, f"{file_name}.{extension}")})
+    if not jobs:
+        raise ValueError("The manifest lists no reports")
+    os.makedirs(output, exist_ok=True)
+    return jobs
+
+
+def run_batch_reports(manifest_path, processes=BATCH_PROCESSES, progress=None):
+    """Render every report in a manifest on a pool of worker processes.
+
+    Workers start with "spawn", so none inherits the Tk interpreter or a
+    pyplot backend; they draw on plain Agg figures and share the on-disk
+    compile cache. ``progress(done, total)`` is called as reports finish.
+    Failures are collected and raised together once the rest are written.
+    """
+    jobs = load_batch_manifest(manifest_path)
+    failures = []
+    with ProcessPoolExecutor(min(processes, len(jobs)), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_batch_worker, initargs=(CACHE_DIR,)) as pool:
+        futures = [pool.submit(build_batch_report, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            name, path, error = future.result()
+            if error is not None:
+                failures.append(f"{name}: {error}")
+            if progress is not None:
+                progress(done, len(jobs))
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(jobs)} reports failed\n" + "\n".join(failures[:10]))
+    return os.path.dirname(jobs[0]["path"])
+
+
+def save_figure(path, figure):
+    figure.savefig(path, dpi=EXPORT_DPI, bbox_inches='tight')
+
+
+def render_image_report(path, report, figure):
+    """The one-page function analysis report, with the graph pasted below the text."""
+    temp_path = None
+    try:
+        function_count = len(report['functions'])
+        extra_height = max(0, (function_count - 1) * 30) 
+
+        if 'critical_values' in report:
+            extra_height += len(report['critical_values']) * 30
+        if 'intersections' in report:
+            extra_height += 40 + len(report['intersections']) * 30
+        if 'shape' in report:
+            extra_height += 40 + len(report['shape']) * 30
+
+        receipt_width, receipt_height = 600, 630 + extra_height
+        image = Image.new('RGB', (receipt_width, receipt_height), 'white')
+        draw = ImageDraw.Draw(image)
+
+        try:
+            font_title = ImageFont.truetype("arial", 24)
+            font_text = ImageFont.truetype("arial", 16)
+        except:
+            font_title = ImageFont.load_default()
+            font_text = ImageFont.load_default()
+
+        draw.text((30, 30), "DerivaPlot Function Analysis Report", fill="black", font=font_title)
+
+        y_pos = 80
+        for i, func_data in enumerate(report['functions']):
+            func_label = f"Function {i+1}: " if i > 0 else "Function: "
+            draw.text((30, y_pos), f"{func_label}{func_data['expr']}", fill="black", font=font_text)
+            y_pos += 30
+
+        draw.text((30, y_pos), f"X Range: [{report['x_range'][0]}, {report['x_range'][1]}]", 
+                fill="black", font=font_text)
+        y_pos += 30
+
+        if 'order' in report:
+            draw.text((30, y_pos), f"Derivative Order: {report['order']}", fill="black", font=font_text)
+            y_pos += 30
+
+        if 'critical_values' in report:
+            y_pos += 10
+            draw.text((30, y_pos), "Critical Values:", fill="black", font=font_text)
+            y_pos += 30
+
+            for func_data in report['critical_values']:
+                cv_text = f"{func_data['expr']}: "
+                if func_data['critical_values']:
+                    cv_points = ", ".join([f"x={cv['x']:.2f}" for cv in func_data['critical_values']])
+                    cv_text += cv_points
+                else:
+                    cv_text += "No critical values"
+
+                draw.text((30, y_pos), cv_text, fill="black", font=font_text)
+                y_pos += 30
+
+        if 'intersections' in report:
+            y_pos += 10
+            draw.text((30, y_pos), "Intersections:", fill="black", font=font_text)
+            y_pos += 30
+
+            for point in report['intersections']:
+                first, second = point['pair']
+                draw.text((30, y_pos), f"{first} = {second} at x={point['x']:.2f}, y={point['y']:.2f}",
+                        fill="black", font=font_text)
+                y_pos += 30
+
+        if 'shape' in report:
+            y_pos += 10
+            draw.text((30, y_pos), "Inflection Points:", fill="black", font=font_text)
+            y_pos += 30
+
+            for shape in report['shape']:
+                points = ", ".join(f"x={x:.2f}" for x, _ in shape['inflections']) or "None"
+                draw.text((30, y_pos), f"{shape['expr']}: {points}", fill="black", font=font_text)
+                y_pos += 30
+
+        draw.text((30, y_pos), f"Date: {np.datetime64('today')}", fill="black", font=font_text)
+        y_pos += 30
+
+        # temp file
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
+            temp_path = temp_file.name
+            figure.savefig(temp_path, dpi=150, bbox_inches='tight')
+
+        graph_img = Image.open(temp_path)
+        graph_img = graph_img.resize((520, 380), Image.LANCZOS)
+        image.paste(graph_img, (40, y_pos))
+
+        # Footer
+        footer_text = "Thank you for using DerivaPlot"
+        draw.text((30, receipt_height - 30), footer_text, fill="black", font=font_text)
+
+        image.save(path)
+    finally:
+        # temp file cleaner
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class ExportQueue:
+    """Renders saved images and reports one after another on a worker thread.
+
+    Jobs get a pickled snapshot of the figure and report data, unpickled
+    onto a standalone Agg canvas in the worker, so the user can keep
+    plotting, zooming or queueing more exports meanwhile. The Tk side calls
+    ``finished_jobs`` to collect results; nothing here touches a widget.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.finished = collections.deque()
+        self.active = None
+        self.detail = None  # e.g. "3/40" from a job that reports progress
+        self.submitted = 0
+        self.completed = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, label, path, render, *snapshot, progress=False):
+        # snapshot now, on the Tk thread; rendering later sees exactly this state
+        self.jobs.put((label, path, render, pickle.dumps(snapshot), progress))
+        self.submitted += 1
+
+    @property
+    def pending(self):
+        return self.submitted - self.completed
+
+    def run(self):
+        while True:
+            label, path, render, snapshot, progress = self.jobs.get()
+            self.active = (label, path)
+            self.detail = None
+            error = result = None
+            try:
+                args = pickle.loads(snapshot)
+                for figure in args:
+                    if isinstance(figure, matplotlib.figure.Figure):
+                        FigureCanvasAgg(figure)
+                        for artist in figure.findobj(lambda artist: artist.get_animated()):
+                            artist.set_animated(False)  # blitted on screen, drawn normally here
+                            if artist.get_gid() == "crosshair":
+                                artist.set_visible(False)  # the hover readout isn't part of the plot
+                if progress:
+                    result = render(path, *args, progress=self.report_progress)
+                else:
+                    result = render(path, *args)
+            except Exception as e:
+                error = e
+            self.active = None
+            # a render that writes elsewhere (a batch's output folder) returns that path
+            self.finished.append((label, result if isinstance(result, str) else path, error))
+
+    def report_progress(self, done, total):
+        self.detail = f"{done}/{total}"
+
+    def finished_jobs(self):
+        while self.finished:
+            self.completed += 1
+            yield self.finished.popleft()
+
+
+class RingBuffer:
+    """The last `capacity` stream samples as rows of x, y, dy/dx and the running integral.
+
+    Each batch only touches the new samples: the slope at a sample is the
+    least-squares line through it and the window - 1 before it (sliding sums
+    over the tail plus the batch), and the integral advances by trapezoids
+    from a scalar total. Memory stays fixed however long the stream runs.
+    """
+
+    def __init__(self, capacity=STREAM_CAPACITY, window=STREAM_WINDOW):
+        self.capacity = capacity
+        self.window = window
+        self.data = np.full((4, capacity), np.nan)
+        self.head = 0  # next slot to write
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+
+    def latest(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        return self.data[:, (self.head - n + np.arange(n)) % self.capacity]
+
+    def extend(self, x, y):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        if not len(x):
+            return
+        previous_x, previous_y = self.last if self.last is not None else (x[0], y[0])
+        steps = 0.5 * (y + np.append(previous_y, y[:-1])) * np.diff(np.append(previous_x, x))
+        integral = self.total + np.cumsum(np.where(np.isfinite(steps), steps, 0.0))
+        self.total, self.last = integral[-1], (x[-1], y[-1])
+
+        tail = self.latest(self.window - 1)
+        tx = np.concatenate([tail[0], x])
+        tx = tx - tx[-1]  # conditioning for the sums below
+        ty = np.concatenate([tail[1], y])
+        sums = [np.append(0.0, np.cumsum(v)) for v in (tx, ty, tx * tx, tx * ty)]
+        ends = np.arange(tail.shape[1], len(tx)) + 1
+        starts = np.maximum(ends - self.window, 0)
+        n = ends - starts
+        sx, sy, sxx, sxy = (total[ends] - total[starts] for total in sums)
+        denominator = n * sxx - sx * sx
+        with np.errstate(all="ignore"):
+            slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+
+        rows = np.vstack([x, y, slope, integral])[:, -self.capacity:]
+        self.data[:, (self.head + np.arange(rows.shape[1])) % self.capacity] = rows
+        self.head = (self.head + rows.shape[1]) % self.capacity
+        self.count = min(self.count + rows.shape[1], self.capacity)
+
+
+class StreamSource:
+    """Reads samples from a tailed file, a named pipe or tcp://host:port on a thread.
+
+    Lines are "x,y" (comma, semicolon or whitespace separated) or a bare y,
+    which is stamped with its arrival time. Parsed samples wait in a bounded
+    deque, so a UI that falls behind drops the oldest instead of growing.
+    """
+
+    def __init__(self, spec, capacity=STREAM_CAPACITY):
+        self.spec = spec
+        self.pending = collections.deque(maxlen=capacity)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.started = time.monotonic()
+        self.read_chunk, self.close = self.open(spec)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def open(self, spec):
+        # returns (read_chunk, close); read_chunk gives b"" when idle, None at the end
+        if spec.startswith("tcp://"):
+            host, _, port = spec[len("tcp://"):].rpartition(":")
+            sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=5)
+            sock.settimeout(STREAM_POLL)
+
+            def read_socket():
+                try:
+                    return sock.recv(65536) or None
+                except socket.timeout:
+                    return b""
+            return read_socket, sock.close
+
+        path = os.path.expanduser(spec)
+        if stat.S_ISFIFO(os.stat(path).st_mode):
+            # non-blocking, so stopping never hangs waiting for a writer
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+
+            def read_pipe():
+                try:
+                    return os.read(fd, 65536)
+                except BlockingIOError:
+                    return b""
+            return read_pipe, lambda: os.close(fd)
+
+        fh = open(path, "rb")
+        size = os.fstat(fh.fileno()).st_size
+        if size > STREAM_BACKLOG_BYTES:
+            fh.seek(size - STREAM_BACKLOG_BYTES)
+            fh.readline()  # drop the partial line
+
+        def read_file():
+            if os.stat(path).st_size < fh.tell():
+                fh.seek(0)  # truncated and rewritten
+            return fh.read(65536)
+        return read_file, fh.close
+
+    def run(self):
+        partial = b""
+        try:
+            while not self.stop_event.is_set():
+                chunk = self.read_chunk()
+                if chunk is None:
+                    self.error = "source closed"
+                    break
+                if not chunk:
+                    time.sleep(STREAM_POLL)
+                    continue
+                *lines, partial = (partial + chunk).split(b"\n")
+                for line in lines:
+                    self.parse(line)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.close()
+
+    def parse(self, line):
+        text = line.decode("utf-8", "replace").strip()
+        fields = text.replace(";", ",").replace(",", " ").split()
+        try:
+            if len(fields) == 1:
+                self.pending.append((time.monotonic() - self.started, float(fields[0])))
+            elif len(fields) >= 2:
+                self.pending.append((float(fields[0]), float(fields[1])))
+        except ValueError:
+            pass  # headers and garbage
+
+    def take(self):
+        samples = [self.pending.popleft() for _ in range(len(self.pending))]
+        return np.array(samples, dtype=float).reshape(-1, 2).T
+
+    def stop(self):
+        self.stop_event.set()
+
 
 class FunctionVisualizerApp:
     def __init__(self, root):
@@ -61,7 +2594,30 @@ class FunctionVisualizerApp:
         self.reset_hover_color = "#E04A4A" # for reset plot hehe   
         
         self.graph_path = None
+        # reset once; the figures below are built directly, without pyplot
+        matplotlib.style.use('default')
         self.fig = None
+        self.results = None
+        self.area_selector = None
+        self.spectral_fallbacks = []
+        self.plot_generation = 0
+        self.plot_artists = []
+        self.live_state = None
+        self.live_after_ids = {}
+        self.view_after_id = None
+        self.overlay_artists = {}
+        self.stream = None
+        # finished frames per theme, so toggling back is a blit instead of a redraw
+        self.theme_frames = {}
+        self.theme_switching = False
+        self.crosshair = None
+        self.function_entries = []
+        self.artifact_cache = {}
+        self.compile_cache = CompileCache()
+        self.integral_engine = IntegralEngine(self.compile_cache)
+        self.integral_engine.start()
+        self.exports = ExportQueue()
+        self.export_poll_id = None
         
         self.create_widgets()
 
@@ -72,6 +2628,7 @@ class FunctionVisualizerApp:
         ctk.CTkLabel(function_row, text="Func " + str(len(self.functions_list) + 2) + ":", width=80).pack(side="left", padx=5)
         entry_func = ctk.CTkEntry(function_row, width=240, placeholder_text="e.g., cos(x)")
         entry_func.pack(side="left", padx=5, fill="x", expand=True)
+        entry_func.bind("<KeyRelease>", lambda event, ef=entry_func: self.on_entry_changed(ef))
         
         remove_btn = ctk.CTkButton(
             function_row,
@@ -81,9 +2638,27 @@ class FunctionVisualizerApp:
             command=lambda fr=function_row, ef=entry_func: self.remove_function_field(fr, ef)
         )
         remove_btn.pack(side="right", padx=5)
+        ctk.CTkButton(
+            function_row,
+            text="📂",
+            width=30,
+            height=28,
+            command=lambda ef=entry_func: self.browse_data_file(ef)
+        ).pack(side="right")
         
         self.functions_list.append((function_row, entry_func))
 
+    def browse_data_file(self, entry):
+        # measured data goes in a function row as "@path"
+        path = filedialog.askopenfilename(
+            filetypes=[("Data files", "*.csv *.txt *.npy"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        entry.delete(0, "end")
+        entry.insert(0, "@" + path)
+        self.on_entry_changed(entry)
+
     def remove_function_field(self, frame, entry):
         idx = None
         for i, (fr, ent) in enumerate(self.functions_list):
@@ -93,7 +2668,17 @@ class FunctionVisualizerApp:
                 
         if idx is not None:
             frame.destroy()
-            self.functions_list.pop(idx)        
+            self.functions_list.pop(idx)
+
+        # a countdown for the removed entry would fire on a destroyed widget
+        pending = self.live_after_ids.pop(entry, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        state = self.live_state
+        if state is not None and entry in state["entries"]:
+            # None keeps the other entries lined up with their plotted rows
+            state["entries"][state["entries"].index(entry)] = None
+        self.on_entry_changed(None)  # one curve fewer, live mode replots
         
     def create_widgets(self):
         self.top_bar = ctk.CTkFrame(self.root)
@@ -134,6 +2719,13 @@ class FunctionVisualizerApp:
         ctk.CTkLabel(function_row, text="Function:", width=80).pack(side="left", padx=5)
         self.entry_func = ctk.CTkEntry(function_row, width=300, placeholder_text="e.g., sin(x) + 0.5*x**4")
         self.entry_func.pack(side="left", padx=5, fill="x", expand=True)
+        ctk.CTkButton(
+            function_row,
+            text="📂",
+            width=30,
+            height=28,
+            command=lambda: self.browse_data_file(self.entry_func)
+        ).pack(side="right", padx=5)
 
         # Buttons old Sextion
 
@@ -164,6 +2756,41 @@ class FunctionVisualizerApp:
         self.entry_order.insert(0, "1")
         self.entry_order.pack(side="left", padx=5, fill="x", expand=True)
 
+        method_row = ctk.CTkFrame(self.input_frame)
+        method_row.pack(fill="x", pady=3)
+
+        ctk.CTkLabel(method_row, text="Method:", width=80).pack(side="left", padx=5)
+        self.derivative_method = ctk.StringVar(value=DERIVATIVE_METHODS[0])
+        self.method_menu = ctk.CTkOptionMenu(
+            method_row,
+            values=DERIVATIVE_METHODS,
+            variable=self.derivative_method,
+            width=180
+        )
+        self.method_menu.pack(side="left", padx=5)
+
+        self.show_all_orders = ctk.BooleanVar(value=False)
+        self.all_orders_checkbox = ctk.CTkCheckBox(
+            method_row,
+            text="All orders 1..n",
+            variable=self.show_all_orders
+        )
+        self.all_orders_checkbox.pack(side="left", padx=5)
+
+        self.live_mode = ctk.BooleanVar(value=False)
+        self.live_checkbox = ctk.CTkCheckBox(
+            method_row,
+            text="Live update",
+            variable=self.live_mode,
+            command=lambda: self.live_mode.get() and self.live_replot()
+        )
+        self.live_checkbox.pack(side="left", padx=5)
+
+        # the main function maps to its own curve, range and order edits replot everything
+        self.entry_func.bind("<KeyRelease>", lambda event: self.on_entry_changed(self.entry_func))
+        for entry in (self.entry_xmin, self.entry_xmax, self.entry_order):
+            entry.bind("<KeyRelease>", lambda event: self.on_entry_changed(None))
+
         self.functions_list = []  
         self.add_function_button = ctk.CTkButton(
             self.input_frame,
@@ -197,6 +2824,64 @@ class FunctionVisualizerApp:
             hover_color="#E04A4A"
         )
         self.roots_button.pack(fill="x", pady=3, padx=10)        
+
+        self.intersections_button = ctk.CTkButton(
+            self.input_frame,
+            text="Show Intersections",
+            command=self.on_show_intersections,
+            width=120,
+            height=28,
+            state="disabled", 
+            fg_color="#FF5A5A", 
+            hover_color="#E04A4A"
+        )
+        self.intersections_button.pack(fill="x", pady=3, padx=10)
+
+        self.shape_button = ctk.CTkButton(
+            self.input_frame,
+            text="Analyze Shape",
+            command=self.on_show_shape_analysis,
+            width=120,
+            height=28,
+            state="disabled", 
+            fg_color="#FF5A5A", 
+            hover_color="#E04A4A"
+        )
+        self.shape_button.pack(fill="x", pady=3, padx=10)
+
+        self.stream_button = ctk.CTkButton(
+            self.input_frame,
+            text="Stream Live Data",
+            command=self.on_toggle_stream,
+            width=120,
+            height=28,
+            fg_color="#FF5A5A", 
+            hover_color="#E04A4A"
+        )
+        self.stream_button.pack(fill="x", pady=3, padx=10)
+
+        self.export_button = ctk.CTkButton(
+            self.input_frame,
+            text="Export Data",
+            command=self.on_export_data,
+            width=120,
+            height=28,
+            state="disabled", 
+            fg_color="#FF5A5A", 
+            hover_color="#E04A4A"
+        )
+        self.export_button.pack(fill="x", pady=3, padx=10)
+
+        self.batch_button = ctk.CTkButton(
+            self.input_frame,
+            text="Batch Reports",
+            command=self.on_batch_reports,
+            width=120,
+            height=28,
+            fg_color="#FF5A5A", 
+            hover_color="#E04A4A"
+        )
+        self.batch_button.pack(fill="x", pady=3, padx=10)
                 
         # Action buttons
         button_row = ctk.CTkFrame(self.input_frame)
@@ -251,24 +2936,8 @@ class FunctionVisualizerApp:
         )
         self.functions_scroll_frame.pack(fill="x", pady=3)
         self.functions_list = []
-        for i in range(2, 8):  # Automatically add Func 2 to Func 7
-            function_row = ctk.CTkFrame(self.functions_scroll_frame)
-            function_row.pack(fill="x", pady=3)
-            
-            ctk.CTkLabel(function_row, text=f"Func {i}:", width=80).pack(side="left", padx=5)
-            entry_func = ctk.CTkEntry(function_row, width=240, placeholder_text="e.g., cos(x)")
-            entry_func.pack(side="left", padx=5, fill="x", expand=True)
-            
-            remove_btn = ctk.CTkButton(
-                function_row,
-                text="✕",
-                width=30,
-                height=28,
-                command=lambda fr=function_row, ef=entry_func: self.remove_function_field(fr, ef)
-            )
-            remove_btn.pack(side="right", padx=5)
-            
-            self.functions_list.append((function_row, entry_func)) 
+        for _ in range(2, 8):  # Automatically add Func 2 to Func 7
+            self.add_function_field()
 
         # Statistics panel
         self.create_statistics_panel()        
@@ -314,30 +2983,29 @@ class FunctionVisualizerApp:
     
     def update_plot_theme(self):
         if self.fig is not None:
-            background_color = "#242424" if self.appearance_mode == "dark" else "white"
-            text_color = "white" if self.appearance_mode == "dark" else "black"
-            
-            self.fig.patch.set_facecolor(background_color)
-            axes = self.fig.get_axes()
-            for ax in axes:
-                ax.set_facecolor(background_color)
-                ax.tick_params(colors=text_color)
-                ax.xaxis.label.set_color(text_color)
-                ax.yaxis.label.set_color(text_color)
-                ax.title.set_color(text_color)
-                for spine in ax.spines.values():
-                    spine.set_edgecolor(text_color)
-            # Update legend
-            legend = ax.get_legend()
-            if legend is not None:
-                frame = legend.get_frame()
-                frame.set_facecolor(background_color)
-                frame.set_edgecolor(text_color)
-
-                for text in legend.get_texts():
-                    text.set_color(text_color)
-            
-            self.canvas.draw()
+            # a frame is only reusable while nothing but the theme has changed since it was drawn
+            reuse = not self.fig.stale and self.stream is None
+            apply_theme(self.fig, THEMES[self.appearance_mode])
+            if reuse and self.appearance_mode in self.theme_frames:
+                self.fig.stale = False
+                self.blit_overlays()
+                return
+            if not reuse:
+                self.theme_frames = {}  # the content changed since the other theme's frame was taken
+            self.theme_switching = True
+            try:
+                self.canvas.draw()
+            finally:
+                self.theme_switching = False
+
+    def on_canvas_draw(self, event):
+        # any other full draw (zoom, resize, new data) makes the cached frames stale
+        if not self.theme_switching:
+            self.theme_frames = {}
+        if self.stream is None:
+            self.theme_frames[self.appearance_mode] = self.canvas.copy_from_bbox(self.fig.bbox)
+            if self.area_selector is None:
+                self.draw_crosshair()  # otherwise the selector redraws every animated artist itself
 
     def show_help(self):
         text_color = "white" if self.appearance_mode == "dark" else "black"
@@ -372,12 +3040,28 @@ class FunctionVisualizerApp:
     Example: -10 to 10
 
     3. Set the derivative order (1 for first derivative, 2 for second, etc.)
+    and pick a method. "Richardson" also shades an error estimate around the derivative,
+    "Automatic (AD)" is exact to roundoff for orders 1 and 2, "Taylor (Jet)" is exact for
+    any order. "Spectral (FFT)" treats the X range as one period of a periodic function
+    and also integrates in Fourier space. Tick "All orders 1..n" to draw every derivative
+    up to the chosen order
 
     4. Additional Features:
     - Click "+ Add Function" to plot multiple functions simultaneously
+    - Measured data works too: type "@path/to/data.csv" (or .npy) in a function row, or pick the file with the 📂 button. Columns are x and y, or just y. Derivatives of data are Savitzky-Golay smoothed
     - Use the "Show Critical Values" button to identify key points on the function
     - Use the "Show Roots" button to find and display function roots
+    - Use the "Show Intersections" button to mark where the plotted functions cross each other (click again to hide)
+    - Use the "Analyze Shape" button for intervals of increase/decrease and concavity and the inflection points of every function
+    - Use the "Export Data" button to save x, f, the derivative and the integral of every function as CSV, NPY, NPZ or Parquet (Parquet needs pyarrow)
+    - Use the "Batch Reports" button to render many reports at once from a JSON manifest, e.g. {"format": "pdf", "reports": [{"name": "Sheet 1", "functions": ["sin(x)", "x**2"], "x_range": [-5, 5], "order": 1}]}. Reports are written to a folder next to the manifest, several at a time. Without the window: python UPDATE-7.py --batch manifest.json
     - Toggle between light and dark themes for comfortable viewing
+    - Switching back to a theme already shown redraws instantly from a cached frame
+    - Drag across a plotted graph to shade a region and read its area live
+    - Hover over the graph for a crosshair; the status bar reads f, the derivative and the integral of every function at the cursor
+    - Zoom or pan with the toolbar and the visible window is recomputed at full resolution; a shaded min/max envelope shows detail finer than the screen, even for huge ranges or datasets
+    - Tick "Live update" to replot as you type; only the curve you are editing is recomputed
+    - Click "Stream Live Data" to follow a growing file, a named pipe or tcp://host:port. Lines are "x,y" or just y; the signal is drawn with its rolling derivative and running integral (click "Stop Stream" to freeze it)
 
     5. Click "Plot Functions" to visualize:
     - The original function
@@ -391,7 +3075,8 @@ class FunctionVisualizerApp:
 
     7. Additional Buttons:
     - "Save Image": Export the graph as PNG, JPEG, or PDF
-    - "Generate Report": Create a comprehensive function analysis report
+    - "Generate Report": Create a comprehensive function analysis report. As PDF it is a multi-page vector document: a summary, the graph, then a page per function with its curves, statistics, roots and critical values
+    - Images and reports are saved in the background, so you can keep working; progress shows in the status bar and several saves can be queued
     - "Refresh": Update the plot without clearing inputs
     - "Reset": Clear all inputs and reset the graph
 
@@ -433,7 +3118,9 @@ class FunctionVisualizerApp:
         )
         close_button.pack(pady=10)
         
-    def validate_inputs(self):
+    def validate_inputs(self, quiet=False):
+        # quiet is for live mode, where half-typed input is expected
+        report = (lambda title, message: None) if quiet else messagebox.showerror
         main_expr = self.entry_func.get().strip()
         x_min = self.entry_xmin.get().strip()
         x_max = self.entry_xmax.get().strip()
@@ -441,42 +3128,38 @@ class FunctionVisualizerApp:
         
         # Check for empty fields
         if not main_expr:
-            messagebox.showerror("Input Error", "Main function expression cannot be empty")
+            report("Input Error", "Main function expression cannot be empty")
             return False, None, None, None
         
         if not x_min:
-            messagebox.showerror("Input Error", "Minimum x value cannot be empty")
+            report("Input Error", "Minimum x value cannot be empty")
             return False, None, None, None
             
         if not x_max:
-            messagebox.showerror("Input Error", "Maximum x value cannot be empty")
+            report("Input Error", "Maximum x value cannot be empty")
             return False, None, None, None
             
         if not order:
-            messagebox.showerror("Input Error", "Derivative order cannot be empty")
+            report("Input Error", "Derivative order cannot be empty")
             return False, None, None, None
             
         try:
-            x = sp.symbols('x')
             functions = []
+            entries = []
             
             # Process main function
-            sympy_expr = sp.sympify(main_expr, locals={"sin": sp.sin, "cos": sp.cos, "tan": sp.tan, 
-                                                "exp": sp.exp, "log": sp.log, "sqrt": sp.sqrt,
-                                                "pi": sp.pi, "e": sp.E})
-            f_main = sp.lambdify(x, sympy_expr, 'numpy')
+            f_main = parse_source(main_expr)
             functions.append((main_expr, f_main))
+            entries.append(self.entry_func)
             
             # Process additional functions
             for _, entry in self.functions_list:
                 expr = entry.get().strip()
                 if expr:  # Only process non-empty functions
                     try:
-                        sympy_expr = sp.sympify(expr, locals={"sin": sp.sin, "cos": sp.cos, "tan": sp.tan, 
-                                                        "exp": sp.exp, "log": sp.log, "sqrt": sp.sqrt,
-                                                        "pi": sp.pi, "e": sp.E})
-                        f = sp.lambdify(x, sympy_expr, 'numpy')
+                        f = parse_source(expr)
                         functions.append((expr, f))
+                        entries.append(entry)
                     except Exception as e:
                         raise ValueError(f"Invalid function '{expr}': {e}")
             
@@ -499,12 +3182,19 @@ class FunctionVisualizerApp:
                 except Exception:
                     raise ValueError("One or more functions cannot be evaluated. Check your syntax.")
             
+            # which entry each plotted function came from, for live updates
+            self.function_entries = entries
             return True, functions, (x_min_val, x_max_val), order_val
         except Exception as e:
-            messagebox.showerror("Input Error", f"Invalid input: {e}")
+            report("Input Error", f"Invalid input: {e}")
             return False, None, None, None
-            
+
     def numerical_derivative(self, f, x_vals, order=1):
+        if isinstance(f, SampledData):
+            return f.derivative(x_vals, order)
+        if getattr(f, "poly", None) is not None:
+            # exact coefficient-level derivative
+            return horner(np.polyder(f.poly, order), x_vals)
         if order == 1:
             dx = x_vals[1] - x_vals[0]
             return np.gradient(f(x_vals), dx)
@@ -516,12 +3206,130 @@ class FunctionVisualizerApp:
                 result = np.gradient(result, dx)
             return result
 
+    def compute_artifacts(self, f, x_vals, orders):
+        # returns (values, {order: (derivative, error or None)}, integral)
+        period, parity = function_structure(f) if hasattr(f, "tree") else (None, None)
+        x_min, x_max = x_vals[0], x_vals[-1]
+
+        if period is not None and x_max - x_min >= MIN_PERIODS_TO_TILE * period:
+            # one fundamental period's spectrum gives the integral across the
+            # whole range (its mean ramp carries the per-period increments) and,
+            # for the spectral method, the derivatives; the values and the other
+            # methods' derivatives are still evaluated at every plotted x
+            one_period = (x_min, x_min + period)
+            coeffs = spectral_coefficients(f, one_period)
+            if coeffs is not None:
+                if self.derivative_method.get() == "Spectral (FFT)":
+                    derivatives = {
+                        order: (spectral_derivative(coeffs, one_period, x_vals, order), None)
+                        for order in orders
+                    }
+                else:
+                    derivatives = self.compute_derivatives(f, x_vals, orders)
+                return f(x_vals), derivatives, spectral_integral(coeffs, one_period, x_vals)
+
+        symmetric_grid = abs(x_min + x_max) <= 1e-12 * abs(x_max)
+        # the spectral method needs the whole range as its period
+        if parity is None or not symmetric_grid or self.derivative_method.get() == "Spectral (FFT)":
+            return f(x_vals), self.compute_derivatives(f, x_vals, orders), self.numerical_integral(f, x_vals)
+
+        # evaluate the left half and reflect it onto the right
+        n = len(x_vals)
+        half = (n + 1) // 2
+        x_half = x_vals[:half]
+        mirror = n - 1 - np.arange(half, n)
+        sign = 1.0 if parity == "even" else -1.0
+
+        y_half = f(x_half)
+        y_vals = np.concatenate([y_half, sign * y_half[mirror]])
+
+        derivatives = {}
+        x_ghost = x_vals[:min(half + max(orders) * MIRROR_GHOST_SAMPLES, n)]
+        for order, (values, error) in self.compute_derivatives(f, x_ghost, orders).items():
+            values = values[:half]
+            values = np.concatenate([values, sign * (-1) ** order * values[mirror]])
+            if error is not None:
+                error = error[:half]
+                error = np.concatenate([error, error[mirror]])
+            derivatives[order] = (values, error)
+
+        integral_half = self.numerical_integral(f, x_half)
+        if parity == "odd":
+            integral_tail = integral_half[mirror]
+        else:
+            # the cell straddling 0 when n is even
+            middle = quad(f, x_half[-1], -x_half[-1])[0] if n % 2 == 0 else 0.0
+            integral_tail = 2 * integral_half[-1] + middle - integral_half[mirror]
+        return y_vals, derivatives, np.concatenate([integral_half, integral_tail])
+
+    def compute_derivatives(self, f, x_vals, orders):
+        if isinstance(f, SampledData):
+            # measured data is always smoothed, whatever the method
+            return {order: (f.derivative(x_vals, order), None) for order in orders}
+
+        method = self.derivative_method.get()
+        if method == "Taylor (Jet)" and getattr(f, "poly", None) is None and hasattr(f, "tree"):
+            # one pass yields every order up to the highest requested
+            jets = taylor_derivatives(f, x_vals, max(orders))
+            return {order: (jets[order], None) for order in orders}
+
+        if method == "Spectral (FFT)" and getattr(f, "poly", None) is None:
+            coeffs = spectral_coefficients(f, (x_vals[0], x_vals[-1]))
+            if coeffs is not None:
+                x_range = (x_vals[0], x_vals[-1])
+                return {order: (spectral_derivative(coeffs, x_range, x_vals, order), None) for order in orders}
+            self.spectral_fallbacks.append(getattr(f, "source", str(f)))
+
+        results = {}
+        for order in orders:
+            if getattr(f, "poly", None) is not None or method == "Finite Difference":
+                results[order] = (self.numerical_derivative(f, x_vals, order), None)
+                continue
+            if method == "Automatic (AD)":
+                values = ad_derivative(f, x_vals, order)
+                if values is not None:
+                    results[order] = (values, None)
+                    continue
+                # orders above 2 are left to Richardson
+            # as is everything the spectral engine can't represent
+            results[order] = richardson_derivative(f, x_vals, order)
+        return results
+
     def numerical_integral(self, f, x_vals):
+        if isinstance(f, SampledData):
+            return f.integral(x_vals)
+
+        if getattr(f, "poly", None) is not None:
+            antiderivative = np.polyint(f.poly)
+            return horner(antiderivative, x_vals) - horner(antiderivative, x_vals[0])
+
+        if self.derivative_method.get() == "Spectral (FFT)":
+            coeffs = spectral_coefficients(f, (x_vals[0], x_vals[-1]))
+            if coeffs is not None:
+                return spectral_integral(coeffs, (x_vals[0], x_vals[-1]), x_vals)
+
+        if hasattr(f, "sympy"):
+            kernel = self.integral_engine.antiderivative(f)
+            if kernel is not None:
+                try:
+                    with np.errstate(all="ignore"):
+                        values = np.broadcast_to(np.asarray(kernel(x_vals), dtype=float), x_vals.shape)
+                    values = values - values[0]  # anchored at the plot's lower bound
+                    # e.g. -log(cos(x)) for tan(x) is nan wherever cos(x) < 0
+                    if np.all(np.isfinite(values[np.isfinite(f(x_vals))])):
+                        return values
+                except Exception as e:
+                    print(f"Antiderivative evaluation error: {e}")
+
+        y_vals = f(x_vals)
+        if np.all(np.isfinite(y_vals)):
+            if cumulative_simpson is not None:
+                return cumulative_simpson(y_vals, x=x_vals, initial=0)
+            return cumulative_trapezoid(y_vals, x_vals, initial=0)
         return np.array([quad(f, x_vals[0], x)[0] for x in x_vals])
         
     def on_plot(self):
-        if self.fig is not None:
-            plt.close(self.fig)
+        self.cancel_progressive()
         try:
             is_valid, functions, x_range, order_val = self.validate_inputs()
             if not is_valid:
@@ -538,167 +3346,438 @@ class FunctionVisualizerApp:
             self.status_var.set("Calculating and plotting...")
             self.root.update()
             
-            # Create plot
-            x_vals = np.linspace(x_range[0], x_range[1], 400)
-            
             try:
-                # Create figure
-                plt.style.use('default')
-                self.fig, ax = plt.subplots(figsize=(8, 5))
-                
-                # Set colors based on theme
-                background_color = "#242424" if self.appearance_mode == "dark" else "white"
-                text_color = "white" if self.appearance_mode == "dark" else "black"
-                self.fig.patch.set_facecolor(background_color)
-                ax.set_facecolor(background_color)
-                
-                # Color cycle for multiple functions
-                colors = plt.cm.tab10.colors
-                
-                all_functions_data = []
-                
-                # Plot each function with its derivative and integral
-                for i, (expr, f) in enumerate(functions):
-                    # Determine color palette
-                    if len(functions) == 1:
-                        # For single function, use distinct colors
-                        base_color = colors[0]
-                        derivative_color = colors[1]
-                        integral_color = colors[2]
-                    else:
-                        # For multiple functions, use consistent color per function
-                        color_idx = i % len(colors)
-                        base_color = colors[color_idx]
-                        derivative_color = base_color
-                        integral_color = base_color
-                    
-                    # Calculate function, derivative and integral
-                    y_vals = f(x_vals)
-                    dydx_vals = self.numerical_derivative(f, x_vals, order_val)
-                    integral_vals = self.numerical_integral(f, x_vals)
-                    
-                    # Plot with different line styles
-                    ax.plot(x_vals, y_vals, label=f'Function: {expr}', 
-                        color=base_color, linewidth=2)
-                    ax.plot(x_vals, dydx_vals, label=f'{order_val}-Order Derivative of {expr}', 
-                        color=derivative_color, linestyle='dashed', linewidth=1.5)
-                    ax.plot(x_vals, integral_vals, label=f'Integral of {expr}', 
-                        color=integral_color, linestyle='dotted', linewidth=1.5)
-                    
-                    # Store data for later use
-                    all_functions_data.append({
-                        "expr": expr,
-                        "function": f,
-                        "y_vals": y_vals,
-                        "derivative": dydx_vals,
-                        "integral": integral_vals
-                    })
-                
-                # Set labels and appearance
-                ax.set_xlabel('x', color=text_color)
-                ax.set_ylabel('y', color=text_color)
-                ax.set_title('Functions, Derivatives, and Integrals', color=text_color)
-                ax.tick_params(colors=text_color)
-                for spine in ax.spines.values():
-                    spine.set_edgecolor(text_color)
-                
-                # Update legend
-                legend = ax.legend()
-                if legend is not None:
-                    frame = legend.get_frame()
-                    frame.set_facecolor(background_color)
-                    frame.set_edgecolor(text_color)
-                    for text in legend.get_texts():
-                        text.set_color(text_color)
-                        
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                
-                # Display in UI
-                self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
-                self.canvas.draw()
-                self.canvas.get_tk_widget().pack(fill="both", expand=True)
-                
-                # navigation toolbar
-                self.toolbar_frame = ctk.CTkFrame(self.canvas_frame)
-                self.toolbar_frame.pack(side="bottom", fill="x")
-                self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
-                self.toolbar.update()
+                self.render_plot(functions, x_range, order_val, refresh=False)
+            except Exception as e:
+                messagebox.showerror("Calculation Error", f"Error calculating results: {e}")
+                self.status_var.set("Error in calculation")
                 
-                # Enable save buttons
-                self.btn_save.configure(state="normal")
-                self.btn_receipt.configure(state="normal")
-                self.critical_values_button.configure(state="normal")
-                self.roots_button.configure(state="normal")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {e}")
+            self.create_empty_graph()
+            self.status_var.set("Error occurred")
+
+    def cancel_progressive(self):
+        # pending refinement passes check this and drop out
+        self.plot_generation += 1
+        self.stop_stream()
 
-                self.btn_refresh.grid(row=0, column=4, padx=3, pady=5)
+    def render_plot(self, functions, x_range, order_val, refresh=False):
+        """Draw a coarse preview right away and queue the full-accuracy passes.
+
+        The preview uses PROGRESSIVE_COARSE_SAMPLES points, the plain
+        finite-difference derivative and a trapezoid integral. Each function is
+        then recomputed at PLOT_SAMPLES with the selected engines in its own
+        ``after`` callback, and its artists get the new data in place.
+        """
+        self.cancel_progressive()
+        generation = self.plot_generation
+        orders = list(range(1, order_val + 1)) if self.show_all_orders.get() else [order_val]
+        x_coarse = np.linspace(x_range[0], x_range[1], PROGRESSIVE_COARSE_SAMPLES)
+
+        # Create figure
+        self.fig = matplotlib.figure.Figure(figsize=(8, 5))
+        ax = self.fig.subplots()
+        
+        # Color cycle for multiple functions
+        colors = PLOT_COLORS
+        
+        self.plot_artists = []
+        self.area_selector = None  # re-attached to the new axes once refined
+        for i, (expr, f) in enumerate(functions):
+            # Determine color palette
+            if len(functions) == 1:
+                # For single function, use distinct colors
+                base_color = colors[0]
+                derivative_color = colors[1]
+                integral_color = colors[2]
+            else:
+                # For multiple functions, use consistent color per function
+                color_idx = i % len(colors)
+                base_color = colors[color_idx]
+                derivative_color = base_color
+                integral_color = base_color
+
+            # Coarse pass: nothing here may cost more than a few evaluations
+            with np.errstate(all="ignore"):
+                y_vals = f(x_coarse)
+                derivatives = {order: self.numerical_derivative(f, x_coarse, order) for order in orders}
+                integral_vals = cumulative_trapezoid(y_vals, x_coarse, initial=0)
+
+            # Plot with different line styles
+            self.plot_artists.append({
+                "function": ax.plot(x_coarse, y_vals, label=f'Function: {expr}', 
+                    color=base_color, linewidth=2)[0],
+                "derivative": ax.plot(x_coarse, derivatives[order_val], label=f'{order_val}-Order Derivative of {expr}', 
+                    color=derivative_color, linestyle='dashed', linewidth=1.5)[0],
+                "lower_orders": {
+                    lower_order: ax.plot(x_coarse, derivatives[lower_order], label=f'{lower_order}-Order Derivative of {expr}',
+                        color=derivative_color, linestyle='dashdot', linewidth=1, alpha=0.6)[0]
+                    for lower_order in orders[:-1]
+                },
+                "integral": ax.plot(x_coarse, integral_vals, label=f'Integral of {expr}', 
+                    color=integral_color, linestyle='dotted', linewidth=1.5)[0],
+                "error_band": None,
+                "envelope": None,
+                "derivative_color": derivative_color
+            })
+        
+        # Set labels and appearance
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        ax.set_title('Functions, Derivatives, and Integrals')
+        ax.legend()
+        apply_theme(self.fig, THEMES[self.appearance_mode])
                 
-                # Store data for receipt
-                self.current_data = {
-                    "functions": [{"expr": expr} for expr, _ in functions],
-                    "x_range": x_range,
-                    "order": order_val
-                }
+        ax.grid(True, alpha=0.3)
+        self.fig.tight_layout()
+        
+        # Display in UI
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
+        self.canvas.mpl_connect("draw_event", self.on_canvas_draw)
+        self.attach_crosshair(ax)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        
+        # navigation toolbar
+        self.toolbar_frame = ctk.CTkFrame(self.canvas_frame)
+        self.toolbar_frame.pack(side="bottom", fill="x")
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
+        self.toolbar.update()
+
+        if not refresh:
+            # Enable save buttons
+            self.btn_save.configure(state="normal")
+            self.btn_receipt.configure(state="normal")
+            self.critical_values_button.configure(state="normal")
+            self.roots_button.configure(state="normal")
+            self.intersections_button.configure(state="normal")
+            self.shape_button.configure(state="normal")
+            self.export_button.configure(state="normal")
+
+            self.btn_refresh.grid(row=0, column=4, padx=3, pady=5)
+
+            # reset
+            self.btn_plot.configure(
+                text="Reset Plot", 
+                command=self.on_reset_plot, 
+                fg_color=self.reset_button_color,
+                hover_color=self.reset_hover_color
+            )
+        
+        # Store data for receipt
+        self.current_data = {
+            "functions": [{"expr": expr} for expr, _ in functions],
+            "x_range": x_range,
+            "order": order_val
+        }
+
+        self.spectral_fallbacks = []
+        self.status_var.set("Preview drawn, refining...")
+        state = {
+            "functions": functions,
+            "x_range": x_range,
+            "order": order_val,
+            "orders": orders,
+            "ax": ax,
+            "refresh": refresh,
+            "next": 0,
+            "failures": [],
+            "results": ResultStore(functions, np.linspace(x_range[0], x_range[1], PLOT_SAMPLES), orders),
+            "entries": list(self.function_entries)
+        }
+        state["x_vals"] = state["results"].x
+        self.integral_engine.retain(f for _, f in functions)
+        self.live_state = state
+        self.results = state["results"]
+        self.overlay_artists = {}
+        ax.callbacks.connect("xlim_changed", lambda changed_ax: self.on_view_changed())
+        self.root.after(1, lambda: self.refine_plot(generation, state))
+
+    def style_legend(self, ax):
+        theme = THEMES[self.appearance_mode]
+        legend = ax.legend()
+        if legend is not None:
+            frame = legend.get_frame()
+            frame.set_facecolor(theme["background"])
+            frame.set_edgecolor(theme["text"])
+            for text in legend.get_texts():
+                text.set_color(theme["text"])
 
-                # reset
-                self.btn_plot.configure(
-                    text="Reset Plot", 
-                    command=self.on_reset_plot, 
-                    fg_color=self.reset_button_color,
-                    hover_color=self.reset_hover_color
-                )
-                
-                self.update_statistics(functions, x_range)
-                self.status_var.set("Plot completed successfully")
-            except Exception as e:
-                messagebox.showerror("Calculation Error", f"Error calculating results: {e}")
-                self.status_var.set("Error in calculation")
-                
+    def refine_plot(self, generation, state):
+        if generation != self.plot_generation:
+            return  # the user plotted, refreshed or reset in the meantime
+
+        i = state["next"]
+        expr, f = state["functions"][i]
+        x_vals, order_val, ax = state["x_vals"], state["order"], state["ax"]
+        artists = self.plot_artists[i]
+        results = state["results"]
+        try:
+            # Calculate function, derivative and integral
+            record = results.store(i, expr, f, *self.cached_artifacts(expr, f, x_vals, state["orders"]))
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
-            self.create_empty_graph()
-            self.status_var.set("Error occurred")
+            # the other functions still get plotted; this one's lines are cleared
+            print(f"Calculation Error: {expr}: {e}")
+            results.fail(i)
+            state["failures"].append(f"{expr} ({e})")
+            for line in (artists["function"], artists["derivative"], artists["integral"],
+                         *artists["lower_orders"].values()):
+                line.set_data([], [])
+            artists["function"].set_label(f'Function: {expr} (failed)')
+            record = None
+
+        if record is not None:
+            dydx_vals = results.row(f"d{order_val}", i)
+            artists["function"].set_data(x_vals, results.row("values", i))
+            artists["derivative"].set_data(x_vals, dydx_vals)
+            for lower_order, line in artists["lower_orders"].items():
+                line.set_data(x_vals, results.row(f"d{lower_order}", i))
+            artists["integral"].set_data(x_vals, results.row("integral", i))
+            if record.has_error:
+                dydx_error = results.row("error", i)
+                artists["error_band"] = ax.fill_between(x_vals, dydx_vals - dydx_error, dydx_vals + dydx_error,
+                    color=artists["derivative_color"], alpha=0.2, linewidth=0)
+
+        ax.relim()
+        ax.autoscale_view()
+        self.canvas.draw_idle()
+
+        state["next"] = i + 1
+        if state["next"] < len(state["functions"]):
+            self.status_var.set(f"Refining {state['next'] + 1} of {len(state['functions'])}...")
+            self.root.after(1, lambda: self.refine_plot(generation, state))
+            return
+
+        self.attach_area_selector(ax)
+        self.refresh_view()  # measured data gets its min/max envelope
+        self.update_statistics(results, state["x_range"])
+        self.status_var.set("Plot refreshed successfully" if state["refresh"] else "Plot completed successfully")
+        if self.spectral_fallbacks:
+            self.status_var.set(
+                "Not periodic over the range, used Richardson for: " + ", ".join(self.spectral_fallbacks)
+            )
+        if state["failures"]:
+            self.style_legend(ax)
+            self.status_var.set("Could not calculate: " + "; ".join(state["failures"]))
+            messagebox.showerror("Calculation Error",
+                                 "Error calculating results:\n" + "\n".join(state["failures"]))
 
-    def find_critical_values(self, function, x_range):
+    def cached_artifacts(self, expr, f, x_vals, orders):
+        # live typing revisits the same expressions over and over
+        key = (expr, getattr(f, "stamp", None), x_vals[0], x_vals[-1], len(x_vals), tuple(orders),
+               self.derivative_method.get())
+        if key in self.artifact_cache:
+            self.artifact_cache[key] = self.artifact_cache.pop(key)  # most recent last
+            return self.artifact_cache[key]
+        artifacts = self.compute_artifacts(f, x_vals, orders)
+        if hasattr(f, "source") and self.integral_engine.waiting(f):
+            return artifacts  # numeric integral for now; the closed form is for the next plot
+        self.artifact_cache[key] = artifacts
+        if len(self.artifact_cache) > ARTIFACT_CACHE_SIZE:
+            self.artifact_cache.pop(next(iter(self.artifact_cache)))
+        return artifacts
+
+    def on_entry_changed(self, entry):
+        if not self.live_mode.get():
+            return
+        # restart the countdown for this entry on every keystroke
+        pending = self.live_after_ids.pop(entry, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self.live_after_ids[entry] = self.root.after(LIVE_DEBOUNCE_MS, lambda: self.live_update(entry))
+
+    def live_update(self, entry):
+        """Redraw just the curve that belongs to ``entry``.
+
+        Anything that changes the set of curves (a new or emptied entry, the
+        range, the order) or arrives before the plot has finished refining
+        goes through a full replot instead.
+        """
+        self.live_after_ids.pop(entry, None)
+        if not self.live_mode.get():
+            return
+        state = self.live_state
+        expr = entry.get().strip() if entry is not None else ""
+        if (state is None or not expr or entry not in state["entries"]
+                or state["next"] < len(state["functions"])):
+            self.live_replot()
+            return
+
+        i = state["entries"].index(entry)
+        if state["functions"][i][0] == expr:
+            return
         try:
-            x = sp.Symbol('x')
-            expr = sp.sympify(function, locals={
-                "sin": sp.sin, "cos": sp.cos, "tan": sp.tan, 
-                "exp": sp.exp, "log": sp.log, "sqrt": sp.sqrt,
-                "pi": sp.pi, "e": sp.E
-            })
+            f = parse_source(expr)
+            with np.errstate(all="ignore"):
+                f(np.array([0.5]))
+        except Exception:
+            self.status_var.set("Live: waiting for a valid expression")
+            return
 
-            derivative = sp.diff(expr, x)
+        x_vals, order_val, ax = state["x_vals"], state["order"], state["ax"]
+        results = state["results"]
+        self.spectral_fallbacks = []
+        # the text this replaces stops integrating, so this one isn't queued behind it
+        self.integral_engine.retain([f] + [g for j, (_, g) in enumerate(state["functions"]) if j != i])
+        try:
+            artifacts = self.cached_artifacts(expr, f, x_vals, state["orders"])
+        except Exception as e:
+            self.status_var.set(f"Live: could not evaluate {expr} ({e})")
+            return
+        record = results.store(i, expr, f, *artifacts)
 
-            critical_points = sp.nroots(derivative)
+        artists = self.plot_artists[i]
+        dydx_vals = results.row(f"d{order_val}", i)
+        artists["function"].set_data(x_vals, results.row("values", i))
+        artists["function"].set_label(f'Function: {expr}')
+        artists["derivative"].set_data(x_vals, dydx_vals)
+        artists["derivative"].set_label(f'{order_val}-Order Derivative of {expr}')
+        for lower_order, line in artists["lower_orders"].items():
+            line.set_data(x_vals, results.row(f"d{lower_order}", i))
+            line.set_label(f'{lower_order}-Order Derivative of {expr}')
+        artists["integral"].set_data(x_vals, results.row("integral", i))
+        artists["integral"].set_label(f'Integral of {expr}')
+        if artists["error_band"] is not None:
+            artists["error_band"].remove()
+            artists["error_band"] = None
+        if record.has_error:
+            dydx_error = results.row("error", i)
+            artists["error_band"] = ax.fill_between(x_vals, dydx_vals - dydx_error, dydx_vals + dydx_error,
+                color=artists["derivative_color"], alpha=0.2, linewidth=0)
 
-            valid_critical_points = [
-                point for point in critical_points 
-                if x_range[0] <= float(point.evalf()) <= x_range[1] and sp.im(point) == 0
-            ]
+        state["functions"][i] = (expr, f)
+        self.current_data["functions"][i] = {"expr": expr}
+        for name in list(self.overlay_artists):
+            self.clear_overlay(name)
 
-            if not valid_critical_points:
-                return []
+        self.style_legend(ax)
+        ax.relim()
+        ax.autoscale_view()
+        self.refresh_view(rows=[i])  # the other curves and their envelopes are unchanged
+        self.update_statistics(results, state["x_range"])
+        self.status_var.set(f"Live: updated {expr}")
+        if self.spectral_fallbacks:
+            self.status_var.set("Not periodic over the range, used Richardson for: " + expr)
 
-            critical_values = []
-            for point in valid_critical_points:
-                point_val = float(point.evalf())
-                func_val = float(expr.subs(x, point))
-                derivative_val = float(derivative.subs(x, point))
-                
-                critical_values.append({
-                    'x': point_val,
-                    'y': func_val,
-                    'derivative': derivative_val
-                })
-            
-            return critical_values
+    def on_view_changed(self):
+        # toolbar zoom and pan fire this for every intermediate limit
+        if self.view_after_id is not None:
+            self.root.after_cancel(self.view_after_id)
+        self.view_after_id = self.root.after(VIEW_DEBOUNCE_MS, self.refresh_view)
+
+    def refresh_view(self, rows=None):
+        """Resample every curve for the visible part of the x range.
+
+        Expressions are re-evaluated at full resolution inside the window
+        only; measured data is read from its tile pyramid at about one tile
+        per pixel column. Both get a min/max envelope behind the line.
+        ``rows`` redraws just those functions in the current window, for an
+        edit that changed a curve but not the view.
+        """
+        self.view_after_id = None
+        state = self.live_state
+        if state is None or state["next"] < len(state["functions"]):
+            return
+        ax, x_range = state["ax"], state["x_range"]
+        lo, hi = ax.get_xlim()
+        lo, hi = max(lo, x_range[0]), min(hi, x_range[1])
+        if hi <= lo:
+            return
+        columns = max(int(ax.get_window_extent().width), 2)
+        if rows is None and state.get("view") == (lo, hi, columns):
+            return  # redrawing with autoscale on reports the same limits again
+        state["view"] = (lo, hi, columns)
+        if lo == x_range[0] and hi == x_range[1]:
+            x_vals = state["x_vals"]  # the refined pass, already cached
+        else:
+            x_vals = np.linspace(lo, hi, max(PLOT_SAMPLES, columns))
+
+        order_val = state["order"]
+        for i in range(len(state["functions"])) if rows is None else rows:
+            expr, f = state["functions"][i]
+            if not state["results"].filled[i]:
+                continue  # failed in the refinement pass, nothing to redraw
+            artists = self.plot_artists[i]
+            try:
+                y_vals, derivatives, integral_vals = self.cached_artifacts(expr, f, x_vals, state["orders"])
+                dydx_vals, dydx_error = derivatives[order_val]
+            except Exception as e:
+                print(f"View refresh error: {e}")
+                continue
+            # the window's integral starts where the full-range one has got to
+            integral_vals = integral_vals + self.integral_between(f, state["results"].records[i].integral_index, x_range[0], lo)
+
+            artists["derivative"].set_data(x_vals, dydx_vals)
+            for lower_order, line in artists["lower_orders"].items():
+                line.set_data(x_vals, derivatives[lower_order][0])
+            artists["integral"].set_data(x_vals, integral_vals)
+            if artists["error_band"] is not None:
+                artists["error_band"].remove()
+                artists["error_band"] = None
+            if dydx_error is not None:
+                artists["error_band"] = ax.fill_between(x_vals, dydx_vals - dydx_error, dydx_vals + dydx_error,
+                    color=artists["derivative_color"], alpha=0.2, linewidth=0)
+
+            if artists["envelope"] is not None:
+                artists["envelope"].remove()
+                artists["envelope"] = None
+            if isinstance(f, SampledData):
+                tile_x, tile_min, tile_max, tile_mean = f.pyramid().view(lo, hi, columns)
+                artists["function"].set_data(tile_x, tile_mean)
+                artists["envelope"] = ax.fill_between(tile_x, tile_min, tile_max,
+                    color=artists["function"].get_color(), alpha=0.3, linewidth=0)
+            else:
+                # a fast oscillation over a wide window aliases in the line
+                # alone; the per-column extremes show its true extent
+                dense = np.linspace(lo, hi, columns * ENVELOPE_OVERSAMPLE)
+                with np.errstate(all="ignore"):
+                    columns_y = np.broadcast_to(f(dense), dense.shape).reshape(columns, ENVELOPE_OVERSAMPLE)
+                column_x = dense.reshape(columns, ENVELOPE_OVERSAMPLE).mean(axis=1)
+                artists["function"].set_data(x_vals, y_vals)
+                artists["envelope"] = ax.fill_between(column_x, np.fmin.reduce(columns_y, axis=1),
+                    np.fmax.reduce(columns_y, axis=1), color=artists["function"].get_color(), alpha=0.3, linewidth=0)
+        self.canvas.draw_idle()
+
+    def integral_between(self, f, index, a, b):
+        # exact where there is an antiderivative, else from the plotted prefix sums
+        if isinstance(f, SampledData):
+            return f.integral(np.array([a, b]))[-1]
+        if f.poly is not None:
+            antiderivative = np.polyint(f.poly)
+            return horner(antiderivative, b) - horner(antiderivative, a)
+        kernel = self.integral_engine.antiderivative(f) if hasattr(f, "sympy") else None
+        if kernel is not None:
+            try:
+                with np.errstate(all="ignore"):
+                    ends = np.broadcast_to(np.asarray(kernel(np.array([a, b])), dtype=float), (2,))
+                if np.all(np.isfinite(ends)):
+                    return ends[1] - ends[0]
+            except Exception as e:
+                print(f"Antiderivative evaluation error: {e}")
+        return index.area(a, b)
+
+    def live_replot(self):
+        is_valid, functions, x_range, order_val = self.validate_inputs(quiet=True)
+        if not is_valid:
+            self.status_var.set("Live: waiting for a valid expression")
+            return
+
+        self.cancel_progressive()
+        if hasattr(self, 'canvas'):
+            self.canvas.get_tk_widget().destroy()
+        if hasattr(self, 'toolbar'):
+            self.toolbar.destroy()
+        if hasattr(self, 'toolbar_frame'):
+            self.toolbar_frame.destroy()
+        try:
+            self.render_plot(functions, x_range, order_val, refresh=self.live_state is not None)
         except Exception as e:
-            print(f"Critical Value Error: {e}")
-            return []
-        
-    def on_show_critical_values(self):
+            self.status_var.set(f"Live: error calculating results ({e})")
 
+    def on_show_critical_values(self):
+        self.cancel_progressive()
+        self.live_state = None  # this view has no derivative curves to update
         try:
             is_valid, functions, x_range, order_val = self.validate_inputs()
             if not is_valid:
@@ -715,18 +3794,13 @@ class FunctionVisualizerApp:
             self.status_var.set("Calculating critical values...")
             self.root.update()
 
-            x_vals = np.linspace(x_range[0], x_range[1], 400)
+            x_vals = np.linspace(x_range[0], x_range[1], PLOT_SAMPLES)
             
             try:
-                plt.style.use('default')
-                self.fig, ax = plt.subplots(figsize=(8, 5))
+                self.fig = matplotlib.figure.Figure(figsize=(8, 5))
+                ax = self.fig.subplots()
 
-                background_color = "#242424" if self.appearance_mode == "dark" else "white"
-                text_color = "white" if self.appearance_mode == "dark" else "black"
-                self.fig.patch.set_facecolor(background_color)
-                ax.set_facecolor(background_color)
-
-                colors = plt.cm.tab10.colors
+                colors = PLOT_COLORS
                 
                 critical_values_data = []
 
@@ -734,9 +3808,11 @@ class FunctionVisualizerApp:
                     color_idx = i % len(colors)
                     base_color = colors[color_idx]
 
-                    y_vals = f(x_vals)
+                    y_vals = self.results.values_for(expr, f, x_vals) if self.results is not None else None
+                    if y_vals is None:
+                        y_vals = f(x_vals)
 
-                    critical_values = self.find_critical_values(expr, x_range)
+                    critical_values = critical_points(f, x_range)
 
                     ax.plot(x_vals, y_vals, label=f'Function: {expr}', 
                         color=base_color, linewidth=2)
@@ -762,25 +3838,19 @@ class FunctionVisualizerApp:
                         "critical_values": critical_values
                     })
 
-                ax.set_xlabel('x', color=text_color)
-                ax.set_ylabel('y', color=text_color)
-                ax.set_title('Functions with Critical Values', color=text_color)
-                ax.tick_params(colors=text_color)
-                for spine in ax.spines.values():
-                    spine.set_edgecolor(text_color)
-
-                legend = ax.legend()
-                if legend is not None:
-                    frame = legend.get_frame()
-                    frame.set_facecolor(background_color)
-                    frame.set_edgecolor(text_color)
-                    for text in legend.get_texts():
-                        text.set_color(text_color)
+                ax.set_xlabel('x')
+                ax.set_ylabel('y')
+                ax.set_title('Functions with Critical Values')
+                ax.legend()
+                apply_theme(self.fig, THEMES[self.appearance_mode])
                         
                 ax.grid(True, alpha=0.3)
-                plt.tight_layout()
+                self.fig.tight_layout()
 
                 self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
+                self.canvas.mpl_connect("draw_event", self.on_canvas_draw)
+                self.crosshair = None
+                self.area_selector = None
                 self.canvas.draw()
                 self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
@@ -805,52 +3875,9 @@ class FunctionVisualizerApp:
             self.create_empty_graph()
             self.status_var.set("Error occurred")
 
-    def find_roots(self, function):
+    def find_roots(self, function, x_range=None):
         try:
-            x = sp.Symbol('x')
-            expr = sp.sympify(function, locals={
-                "sin": sp.sin, "cos": sp.cos, "tan": sp.tan, 
-                "exp": sp.exp, "log": sp.log, "sqrt": sp.sqrt,
-                "pi": sp.pi, "e": sp.E
-            })
-
-            # Use multiple strategies for root finding
-            try:
-                # First, try analytical solving
-                roots = sp.solve(expr, x)
-            except Exception:
-                roots = []
-
-            # If analytical solving fails, use numerical methods
-            if not roots:
-                # Create a numerical function from the symbolic expression
-                def f(val):
-                    return float(expr.subs(x, val))
-                
-                # Use scipy for numerical root finding
-                from scipy.optimize import brentq
-                roots = []
-                
-                # Try to find roots in a reasonable range
-                try:
-                    # Assuming we want roots in the visible range
-                    root = brentq(f, -10, 10)
-                    roots.append(root)
-                except ValueError:
-                    # No roots found in the given range
-                    pass
-
-            # Filter and convert roots
-            valid_roots = []
-            for root in roots:
-                try:
-                    # Convert to float and check if real
-                    root_val = float(root)
-                    valid_roots.append(root_val)
-                except Exception:
-                    pass
-            
-            return valid_roots
+            return function_roots(function, x_range)
         except Exception as e:
             messagebox.showerror("Root Finding Error", f"Error finding roots: {e}")
             return []
@@ -884,7 +3911,7 @@ class FunctionVisualizerApp:
 
                     for expr, f in functions:
 
-                        roots = self.find_roots(expr)
+                        roots = self.find_roots(f, x_range)
 
                         func_frame = ctk.CTkFrame(roots_frame)
                         func_frame.pack(fill="x", pady=5)
@@ -932,6 +3959,310 @@ class FunctionVisualizerApp:
                     messagebox.showerror("Roots Error", f"Error finding roots: {e}")
                     self.create_empty_graph()
 
+    def on_show_intersections(self):
+        state = self.live_state
+        if state is None or state["next"] < len(state["functions"]):
+            messagebox.showinfo("Intersections", "Plot the functions first")
+            return
+        if self.overlay_artists.get("intersections"):
+            # second click hides them again
+            self.clear_overlay("intersections")
+            self.canvas.draw_idle()
+            self.status_var.set("Intersections hidden")
+            return
+        if len(state["functions"]) < 2:
+            messagebox.showinfo("Intersections", "Add at least two functions to find intersections")
+            return
+
+        try:
+            # functions that failed to calculate are left out
+            rows = [record.row for record in state["results"].stored()]
+            functions = [state["functions"][row][1] for row in rows]
+            crossings = [(rows[i], rows[j], x, y)
+                         for i, j, x, y in pairwise_intersections(functions, state["x_range"])]
+        except Exception as e:
+            messagebox.showerror("Intersection Error", f"Error finding intersections: {e}")
+            return
+
+        ax = state["ax"]
+        artists = self.overlay_artists.setdefault("intersections", [])
+        if crossings:
+            artists.append(ax.scatter(
+                [x for _, _, x, _ in crossings], [y for _, _, _, y in crossings],
+                color='purple', marker='X', s=80, zorder=6
+            ))
+        for i, j, x, y in crossings:
+            artists.append(ax.annotate(
+                f"f{i + 1} = f{j + 1}\nx={x:.2f}\ny={y:.2f}",
+                (x, y),
+                xytext=(10, -25),
+                textcoords='offset points',
+                bbox=dict(boxstyle='round,pad=0.3', fc='plum', alpha=0.5),
+                arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0')
+            ))
+        self.canvas.draw_idle()
+
+        self.current_data["intersections"] = [
+            {"pair": (state["functions"][i][0], state["functions"][j][0]), "x": x, "y": y}
+            for i, j, x, y in crossings
+        ]
+        self.status_var.set(f"Found {len(crossings)} intersection(s)")
+
+    def on_show_shape_analysis(self):
+        state = self.live_state
+        if state is None or state["next"] < len(state["functions"]):
+            messagebox.showinfo("Shape Analysis", "Plot the functions first")
+            return
+        if self.overlay_artists.get("shape"):
+            self.clear_overlay("shape")
+            self.canvas.draw_idle()
+            self.status_var.set("Shape analysis hidden")
+            return
+
+        x_vals, ax, results = state["x_vals"], state["ax"], state["results"]
+        rows = [record.row for record in results.stored()]
+        functions = [state["functions"][row] for row in rows]
+        try:
+            y_rows = results.arrays["values"][rows]
+            if "d1" in results.arrays and "d2" in results.arrays:
+                first, second = results.arrays["d1"][rows], results.arrays["d2"][rows]
+            else:
+                first, second = [], []
+                for expr, f in functions:
+                    # the same cached kernels a plot of orders 1 and 2 uses
+                    _, derivatives, _ = self.cached_artifacts(expr, f, x_vals, [1, 2])
+                    first.append(derivatives[1][0])
+                    second.append(derivatives[2][0])
+                first, second = np.array(first), np.array(second)
+            shapes = shape_analysis([f for _, f in functions], x_vals, first, second)
+        except Exception as e:
+            messagebox.showerror("Shape Analysis Error", f"Error analyzing functions: {e}")
+            return
+
+        artists = self.overlay_artists.setdefault("shape", [])
+        for i, (shape, y_vals) in enumerate(zip(shapes, y_rows)):
+            # increasing/decreasing under the curve, concavity as a strip along the bottom
+            for name, color in (("increasing", "green"), ("decreasing", "red")):
+                inside = np.zeros(len(x_vals), dtype=bool)
+                for a, b in shape[name]:
+                    inside |= (x_vals >= a) & (x_vals <= b)
+                artists.append(ax.fill_between(x_vals, 0, y_vals, where=inside, color=color, alpha=0.08, linewidth=0))
+            for name, color in (("concave_up", "royalblue"), ("concave_down", "darkorange")):
+                for a, b in shape[name]:
+                    artists.append(ax.axvspan(a, b, ymin=0.03 * i, ymax=0.03 * (i + 1), color=color, alpha=0.5))
+            if shape["inflections"]:
+                artists.append(ax.scatter(
+                    [x for x, _ in shape["inflections"]], [y for _, y in shape["inflections"]],
+                    color='darkorange', marker='D', s=60, zorder=6
+                ))
+        self.canvas.draw_idle()
+
+        self.current_data["shape"] = [
+            {"expr": expr, **shape} for (expr, _), shape in zip(functions, shapes)
+        ]
+        self.show_shape_table(self.current_data["shape"])
+        self.status_var.set(
+            f"Shape analysis: {sum(len(shape['inflections']) for shape in shapes)} inflection point(s)"
+        )
+
+    def show_shape_table(self, shapes):
+        shape_window = ctk.CTkToplevel(self.root)
+        shape_window.title("Shape Analysis")
+        shape_window.geometry("460x400")
+        shape_window.resizable(width=True, height=True)
+
+        screen_width = shape_window.winfo_screenwidth()
+        screen_height = shape_window.winfo_screenheight()
+        x = (screen_width - 460) // 2
+        y = (screen_height - 400) // 2
+        shape_window.geometry(f'460x400+{x}+{y}')
+
+        shape_frame = ctk.CTkScrollableFrame(shape_window, orientation="vertical")
+        shape_frame.pack(padx=10, pady=10, fill="both", expand=True)
+
+        ctk.CTkLabel(shape_frame, text="Shape Analysis", font=("Arial", 16, "bold")).pack(pady=(0, 10))
+
+        def describe(intervals):
+            return ", ".join(f"[{a:.2f}, {b:.2f}]" for a, b in intervals) or "none"
+
+        for shape in shapes:
+            func_frame = ctk.CTkFrame(shape_frame)
+            func_frame.pack(fill="x", pady=5)
+            ctk.CTkLabel(func_frame, text=f"Function: {shape['expr']}", font=("Arial", 12, "bold")).pack(anchor="w")
+
+            inflections = ", ".join(f"({x:.2f}, {y:.2f})" for x, y in shape["inflections"]) or "none"
+            ctk.CTkLabel(
+                func_frame,
+                text=(
+                    f"Increasing: {describe(shape['increasing'])}\n"
+                    f"Decreasing: {describe(shape['decreasing'])}\n"
+                    f"Concave up: {describe(shape['concave_up'])}\n"
+                    f"Concave down: {describe(shape['concave_down'])}\n"
+                    f"Inflection points: {inflections}"
+                ),
+                justify="left",
+                wraplength=400
+            ).pack(anchor="w", padx=(20, 0))
+
+        ctk.CTkButton(shape_window, text="Close", command=shape_window.destroy).pack(pady=10)
+        shape_window.focus_force()
+
+    def clear_overlay(self, name):
+        # analysis markers drawn over the plot, also dropped from the report
+        for artist in self.overlay_artists.pop(name, []):
+            artist.remove()
+        if hasattr(self, 'current_data'):
+            self.current_data.pop(name, None)
+
+    def on_toggle_stream(self):
+        if self.stream is not None:
+            self.stop_stream()
+            return
+        spec = ctk.CTkInputDialog(
+            title="Stream Live Data",
+            text="File or named pipe to follow, or tcp://host:port\nLines are \"x,y\" or just y"
+        ).get_input()
+        if spec and spec.strip():
+            self.start_stream(spec.strip())
+
+    def start_stream(self, spec):
+        """Plot a live source with its rolling derivative and running integral.
+
+        The three lines are animated artists: each tick restores the cached
+        background and blits only them, at most STREAM_FPS times a second.
+        The axes are only redrawn in full when new data leaves the view.
+        """
+        self.cancel_progressive()
+        try:
+            source = StreamSource(spec)
+        except Exception as e:
+            messagebox.showerror("Stream Error", f"Could not open {spec}: {e}")
+            return
+
+        self.live_state = None
+        self.results = None
+        self.area_selector = None
+        if hasattr(self, 'canvas'):
+            self.canvas.get_tk_widget().destroy()
+        if hasattr(self, 'toolbar'):
+            self.toolbar.destroy()
+        if hasattr(self, 'toolbar_frame'):
+            self.toolbar_frame.destroy()
+
+        self.fig = matplotlib.figure.Figure(figsize=(8, 5))
+        ax = self.fig.subplots()
+
+        colors = PLOT_COLORS
+        lines = [
+            ax.plot([], [], label=f'Stream: {spec}', color=colors[0], linewidth=2, animated=True)[0],
+            ax.plot([], [], label='Rolling Derivative', color=colors[1], linestyle='dashed', linewidth=1.5, animated=True)[0],
+            ax.plot([], [], label='Running Integral', color=colors[2], linestyle='dotted', linewidth=1.5, animated=True)[0],
+        ]
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        ax.set_title('Live Data')
+        ax.legend()
+        apply_theme(self.fig, THEMES[self.appearance_mode])
+        ax.grid(True, alpha=0.3)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(-1, 1)
+        self.fig.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
+        self.canvas.mpl_connect("draw_event", self.on_canvas_draw)
+        self.attach_crosshair(ax)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.toolbar_frame = ctk.CTkFrame(self.canvas_frame)
+        self.toolbar_frame.pack(side="bottom", fill="x")
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
+        self.toolbar.update()
+
+        self.stream = {
+            "source": source, "buffer": RingBuffer(), "ax": ax, "lines": lines,
+            "background": None, "after_id": None,
+        }
+        stream = self.stream
+
+        def on_draw(event):
+            # every full draw (resize, zoom, rescale) refreshes the blit background
+            if self.stream is not stream:
+                return
+            stream["background"] = self.canvas.copy_from_bbox(ax.bbox)
+            for line in lines:
+                ax.draw_artist(line)
+            self.draw_crosshair()
+        stream["draw_cid"] = self.canvas.mpl_connect("draw_event", on_draw)
+        self.canvas.draw()
+
+        self.btn_save.configure(state="normal")
+        self.stream_button.configure(text="Stop Stream")
+        self.status_var.set(f"Streaming from {spec}")
+        self.stream_tick()
+
+    def stream_tick(self):
+        stream = self.stream
+        if stream is None:
+            return
+        stream["after_id"] = self.root.after(1000 // STREAM_FPS, self.stream_tick)
+        source, buffer, ax, lines = stream["source"], stream["buffer"], stream["ax"], stream["lines"]
+        x, y = source.take()
+        if not len(x):
+            if source.error:
+                self.status_var.set(f"Stream stopped: {source.error}")
+                self.stop_stream()
+            return
+        buffer.extend(x, y)
+
+        data = buffer.latest()
+        for line, row in zip(lines, data[1:]):
+            line.set_data(data[0], row)
+        if self.crosshair["x"] is not None and not self.update_crosshair():
+            self.crosshair["x"] = None
+            for artist in self.crosshair["artists"]:
+                artist.set_visible(False)
+
+        # keep the newest sample in view; only a view change pays for a full draw
+        x_lo, x_hi = ax.get_xlim()
+        y_lo, y_hi = ax.get_ylim()
+        newest = data[0, -1]
+        with np.errstate(all="ignore"):
+            values = data[1:]
+            top, bottom = np.nanmax(values), np.nanmin(values)
+        rescale = False
+        if newest > x_hi or data[0, 0] > x_hi:
+            span = max(x_hi - x_lo, (newest - data[0, 0]) / 0.75, 1e-9)
+            ax.set_xlim(newest - 0.75 * span, newest + 0.25 * span)
+            rescale = True
+        if np.isfinite(top) and (top > y_hi or bottom < y_lo):
+            margin = 0.1 * max(top - bottom, 1e-9)
+            ax.set_ylim(min(bottom, y_lo) - margin, max(top, y_hi) + margin)
+            rescale = True
+
+        if rescale or stream["background"] is None:
+            self.canvas.draw()  # the draw_event handler blits the lines
+        else:
+            self.blit_overlays(ax.bbox)
+
+        if self.crosshair["x"] is None:  # else the status bar holds the hover readout
+            self.status_var.set(
+                f"Streaming: f = {data[1, -1]:.4g}, f' = {data[2, -1]:.4g}, "
+                f"∫f = {data[3, -1]:.4g} ({buffer.count} samples)"
+            )
+
+    def stop_stream(self):
+        stream, self.stream = self.stream, None
+        if stream is None:
+            return
+        stream["source"].stop()
+        if stream["after_id"] is not None:
+            self.root.after_cancel(stream["after_id"])
+        self.canvas.mpl_disconnect(stream["draw_cid"])
+        # leave the last frame as an ordinary, savable plot
+        for line in stream["lines"]:
+            line.set_animated(False)
+        self.canvas.draw_idle()
+        self.stream_button.configure(text="Stream Live Data")
+
     def create_statistics_panel(self):
         stats_frame = ctk.CTkFrame(self.input_frame)
         stats_frame.pack(fill="x", pady=3)
@@ -952,37 +4283,164 @@ class FunctionVisualizerApp:
         for i, (key, label) in enumerate(self.stats_labels.items()):
             label.grid(row=i, column=0, sticky="w", padx=5, pady=1) 
 
-    def update_statistics(self, functions, x_range):
+    def update_statistics(self, results, x_range):
         if not hasattr(self, 'stats_labels'):
             return
         
         try:
-            x_vals = np.linspace(x_range[0], x_range[1], 400)
-            all_y_vals = []
-            for _, f in functions:
-                y_vals = f(x_vals)
-                all_y_vals.append(y_vals)
-            
-            all_y_vals = np.concatenate(all_y_vals)
+            # the plotted samples of every function, nothing is re-evaluated
+            all_y_vals = results.arrays["values"]
 
-            self.stats_labels["max_value"].configure(text=f"Max Value: {np.max(all_y_vals):.2f}")
-            self.stats_labels["min_value"].configure(text=f"Min Value: {np.min(all_y_vals):.2f}")
-            self.stats_labels["mean_value"].configure(text=f"Mean Value: {np.mean(all_y_vals):.2f}")
-            self.stats_labels["std_deviation"].configure(text=f"Standard Deviation: {np.std(all_y_vals):.2f}")
+            # nan where measured data doesn't cover the range
+            self.stats_labels["max_value"].configure(text=f"Max Value: {np.nanmax(all_y_vals):.2f}")
+            self.stats_labels["min_value"].configure(text=f"Min Value: {np.nanmin(all_y_vals):.2f}")
+            self.stats_labels["mean_value"].configure(text=f"Mean Value: {np.nanmean(all_y_vals):.2f}")
+            self.stats_labels["std_deviation"].configure(text=f"Standard Deviation: {np.nanstd(all_y_vals):.2f}")
 
-            areas = []
-            for _, f in functions:
-                y_vals = f(x_vals)
-                area = np.trapezoid(y_vals, x_vals)
-                areas.append(area)
-            
-            total_area = np.sum(areas)
+            # read off the cumulative integrals, nothing is re-integrated
+            total_area = sum(record.integral_index.area(x_range[0], x_range[1]) for record in results.stored())
             self.stats_labels["area_under_curve"].configure(text=f"Area Under Curve: {total_area:.2f}")
         
         except Exception as e:
             for label in self.stats_labels.values():
                 label.configure(text="- (Calculation Error)")
 
+    def attach_area_selector(self, ax):
+        # the selector has to stay referenced or it stops receiving events
+        self.area_selector = SpanSelector(
+            ax,
+            self.on_area_select,
+            "horizontal",
+            useblit=True,
+            interactive=True,
+            props=dict(facecolor="orange", alpha=0.25),
+            onmove_callback=self.on_area_select
+        )
+
+    def on_area_select(self, x_min, x_max):
+        results = self.results
+        if results is None or not results.complete or x_max <= x_min:
+            return
+
+        areas = [(record.expr, record.integral_index.area(x_min, x_max)) for record in results.stored()]
+        total_area = sum(area for _, area in areas)
+        self.stats_labels["area_under_curve"].configure(
+            text=f"Area Under Curve: {total_area:.2f} on [{x_min:.2f}, {x_max:.2f}]"
+        )
+        self.status_var.set(
+            f"Area on [{x_min:.2f}, {x_max:.2f}]: " + " | ".join(f"{expr}: {area:.4f}" for expr, area in areas)
+        )
+
+    def attach_crosshair(self, ax):
+        line = ax.axvline(ax.get_xlim()[0], color="gray", linewidth=0.8)
+        markers = ax.scatter([], [], s=30, zorder=6, edgecolors="black", linewidths=0.5)
+        artists = (line, markers)
+        for artist in artists:
+            # animated first, so hovering never marks the figure for a full redraw
+            artist.set_animated(True)
+            artist.set_visible(False)
+            artist.set_gid("crosshair")
+        self.crosshair = {"ax": ax, "line": line, "markers": markers, "artists": artists, "x": None}
+        self.canvas.mpl_connect("motion_notify_event", self.on_crosshair_move)
+        self.canvas.mpl_connect("axes_leave_event", lambda event: self.hide_crosshair())
+
+    def on_crosshair_move(self, event):
+        crosshair = self.crosshair
+        if crosshair is None:
+            return
+        if event.inaxes is not crosshair["ax"] or event.button is not None:
+            self.hide_crosshair()  # off the plot, or dragging out an area
+            return
+        crosshair["x"] = event.xdata
+        if self.update_crosshair():
+            self.blit_overlays(crosshair["ax"].bbox)
+        else:
+            self.hide_crosshair()
+
+    def crosshair_readout(self, x):
+        """Marker heights, their colors and the readout at x.
+
+        Values are read off the lines as drawn (the zoomed window's resample,
+        tile means for data, the ring buffer for a stream), so the markers sit
+        on the curves at any zoom.
+        """
+        stream = self.stream
+        if stream is not None:
+            names, curve_lines, order = ["stream"], [stream["lines"]], 1
+        else:
+            results = self.results
+            if results is None:
+                return None
+            names = [record.expr for record in results.records]
+            curve_lines = [(artists["function"], artists["derivative"], artists["integral"])
+                           for artists in self.plot_artists]
+            order = results.orders[-1]
+
+        derivative = "f'" if order == 1 else f"f^({order})"
+        heights, colors, text = [], [], []
+        for name, lines in zip(names, curve_lines):
+            column = [line_value(line, x) for line in lines]
+            if np.isnan(column).all():
+                continue  # not drawn here
+            text.append(f"{name}: f = {column[0]:.4g}, {derivative} = {column[1]:.4g}, ∫f = {column[2]:.4g}")
+            heights.extend(column)
+            colors.extend(line.get_color() for line in lines)
+        if not text:
+            return None
+        return heights, colors, f"x = {x:.4g}: " + " | ".join(text)
+
+    def update_crosshair(self):
+        crosshair = self.crosshair
+        readout = self.crosshair_readout(crosshair["x"])
+        if readout is None:
+            return False
+        heights, colors, text = readout
+        x = crosshair["x"]
+        crosshair["line"].set_xdata([x, x])
+        crosshair["markers"].set_offsets(np.column_stack([np.full(len(heights), x), heights]))
+        crosshair["markers"].set_facecolors(colors)
+        # the numbers go to the status bar; rasterizing them in the plot would cost more than the blit
+        self.status_var.set(text)
+        for artist in crosshair["artists"]:
+            artist.set_visible(True)
+        return True
+
+    def hide_crosshair(self):
+        crosshair = self.crosshair
+        if crosshair is None or crosshair["x"] is None:
+            return
+        crosshair["x"] = None
+        for artist in crosshair["artists"]:
+            artist.set_visible(False)
+        self.blit_overlays(crosshair["ax"].bbox)
+
+    def draw_crosshair(self):
+        crosshair = self.crosshair
+        if crosshair is not None and crosshair["x"] is not None:
+            for artist in crosshair["artists"]:
+                crosshair["ax"].draw_artist(artist)
+
+    def blit_overlays(self, bbox=None):
+        """Put the blitted artists back over the last full frame and show `bbox` of it."""
+        stream = self.stream
+        if stream is not None:
+            if stream["background"] is None:
+                return
+            self.canvas.restore_region(stream["background"])
+            for line in stream["lines"]:
+                stream["ax"].draw_artist(line)
+        else:
+            frame = self.theme_frames.get(self.appearance_mode)
+            if frame is None or self.fig.stale:
+                return  # a full draw is due and brings them back
+            self.canvas.restore_region(frame)
+            if self.area_selector is not None:
+                for artist in self.area_selector.artists:
+                    if artist.get_visible():
+                        artist.axes.draw_artist(artist)
+        self.draw_crosshair()
+        self.canvas.blit(bbox)
+
     def reset_statistics(self):
         if hasattr(self, 'stats_labels'):
             for label in self.stats_labels.values():
@@ -994,8 +4452,14 @@ class FunctionVisualizerApp:
         self.entry_xmax.delete(0, "end")
         self.entry_order.delete(0, "end")
         self.entry_order.insert(0, "1")
+        self.derivative_method.set(DERIVATIVE_METHODS[0])
+        self.show_all_orders.set(False)
+        self.live_mode.set(False)
         self.critical_values_button.configure(state="disabled")
         self.roots_button.configure(state="disabled")
+        self.intersections_button.configure(state="disabled")
+        self.shape_button.configure(state="disabled")
+        self.export_button.configure(state="disabled")
         self.reset_statistics()
         
         # Clear additional function fields
@@ -1003,23 +4467,8 @@ class FunctionVisualizerApp:
             frame.destroy()
         self.functions_list.clear()
 
-        for i in range(2, 8):  # Recreate Func 2 to Func 7
-            function_row = ctk.CTkFrame(self.functions_scroll_frame)
-            function_row.pack(fill="x", pady=3)
-            
-            ctk.CTkLabel(function_row, text=f"Func {i}:", width=80).pack(side="left", padx=5)
-            entry_func = ctk.CTkEntry(function_row, width=240, placeholder_text="e.g., cos(x)")
-            entry_func.pack(side="left", padx=5, fill="x", expand=True)
-            
-            remove_btn = ctk.CTkButton(
-                function_row,
-                text="✕",
-                width=30,
-                height=28,
-                command=lambda fr=function_row, ef=entry_func: self.remove_function_field(fr, ef)
-            )
-            remove_btn.pack(side="right", padx=5)
-            self.functions_list.append((function_row, entry_func))
+        for _ in range(2, 8):  # Recreate Func 2 to Func 7
+            self.add_function_field()
         
         self.create_empty_graph()
         
@@ -1040,8 +4489,10 @@ class FunctionVisualizerApp:
         self.status_var.set("Ready to plot")
 
     def create_empty_graph(self):
-        if self.fig is not None:
-            plt.close(self.fig)
+        self.cancel_progressive()
+        self.live_state = None
+        self.results = None
+        self.area_selector = None
         if hasattr(self, 'canvas'):
             self.canvas.get_tk_widget().destroy()
         if hasattr(self, 'toolbar'):
@@ -1049,25 +4500,20 @@ class FunctionVisualizerApp:
         if hasattr(self, 'toolbar_frame'):
             self.toolbar_frame.destroy()
 
-        plt.style.use('default')
-        self.fig, ax = plt.subplots(figsize=(8, 5))
-
-        background_color = "#242424" if self.appearance_mode == "dark" else "white"
-        text_color = "white" if self.appearance_mode == "dark" else "black"
-        self.fig.patch.set_facecolor(background_color)
-        ax.set_facecolor(background_color)
+        self.fig = matplotlib.figure.Figure(figsize=(8, 5))
+        ax = self.fig.subplots()
 
-        ax.set_xlabel('x', color=text_color)
-        ax.set_ylabel('y', color=text_color)
-        ax.set_title('Graph will appear here', color=text_color)
-        ax.tick_params(colors=text_color)
-        for spine in ax.spines.values():
-            spine.set_edgecolor(text_color)
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        ax.set_title('Graph will appear here')
+        apply_theme(self.fig, THEMES[self.appearance_mode])
             
         ax.grid(True, alpha=0.3)
-        plt.tight_layout()
+        self.fig.tight_layout()
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
+        self.canvas.mpl_connect("draw_event", self.on_canvas_draw)
+        self.crosshair = None
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
@@ -1076,6 +4522,28 @@ class FunctionVisualizerApp:
         self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
         self.toolbar.update()
     
+    def on_export_data(self):
+        results = self.results
+        if results is None or not results.complete:
+            messagebox.showinfo("Export Data", "Plot the functions first")
+            return
+        filetypes = [("CSV files", "*.csv"), ("NumPy array", "*.npy"), ("NumPy archive", "*.npz")]
+        if pa is not None:
+            filetypes.append(("Parquet files", "*.parquet"))
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=filetypes,
+            initialfile="DerivaPlot_Data.csv"
+        )
+        if not file_path:
+            return
+        try:
+            columns = results.columns()
+            export_curves(file_path, columns)
+            self.status_var.set(f"Exported {len(columns) - 1} columns to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export data: {e}")
+
     def on_save_image(self):
         if self.fig is None:
             messagebox.showerror("Error", "No plot to save")
@@ -1088,12 +4556,42 @@ class FunctionVisualizerApp:
         )
         
         if file_path:
-            try:
-                self.fig.savefig(file_path, dpi=300, bbox_inches='tight')
-                self.status_var.set(f"Image saved to {os.path.basename(file_path)}")
-                messagebox.showinfo("Success", f"Image saved successfully to:\n{file_path}")
-            except Exception as e:
-                messagebox.showerror("Save Error", f"Error saving image: {e}")
+            self.queue_export("Image", file_path, save_figure, self.fig)
+
+    def on_batch_reports(self):
+        manifest_path = filedialog.askopenfilename(
+            title="Select a report manifest",
+            filetypes=[("JSON manifest", "*.json"), ("All files", "*.*")]
+        )
+        if manifest_path:
+            self.queue_export("Batch reports", manifest_path, run_batch_reports, progress=True)
+
+    def queue_export(self, label, path, render, *snapshot, progress=False):
+        try:
+            self.exports.submit(label, path, render, *snapshot, progress=progress)
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Error saving {label.lower()}: {e}")
+            return
+        if self.export_poll_id is None:
+            self.poll_exports()
+
+    def poll_exports(self):
+        # runs every EXPORT_POLL_MS while anything is queued or rendering
+        for label, path, error in self.exports.finished_jobs():
+            if error is not None:
+                self.status_var.set(f"Could not save {os.path.basename(path)}")
+                messagebox.showerror("Save Error", f"Error saving {label.lower()} {os.path.basename(path)}: {error}")
+            else:
+                self.status_var.set(f"{label} saved to {os.path.basename(path)}")
+        if not self.exports.pending:
+            self.export_poll_id = None
+            return
+        active, detail = self.exports.active, self.exports.detail
+        waiting = self.exports.pending - (active is not None)
+        self.status_var.set((f"Saving {os.path.basename(active[1])}..." if active else "Export queued...")
+                            + (f" {detail}" if active and detail else "")
+                            + (f" ({waiting} more queued)" if waiting > 0 else ""))
+        self.export_poll_id = self.root.after(EXPORT_POLL_MS, self.poll_exports)
     
     def on_save_function_report(self):
         if self.fig is None or not hasattr(self, 'current_data'):
@@ -1107,88 +4605,20 @@ class FunctionVisualizerApp:
         )
         if not receipt_path:
             return
-        temp_path = None
-        try:
-            function_count = len(self.current_data['functions'])
-            extra_height = max(0, (function_count - 1) * 30) 
-
-            if 'critical_values' in self.current_data:
-                extra_height += len(self.current_data['critical_values']) * 30
-            
-            receipt_width, receipt_height = 600, 630 + extra_height
-            image = Image.new('RGB', (receipt_width, receipt_height), 'white')
-            draw = ImageDraw.Draw(image)
-
-            try:
-                font_title = ImageFont.truetype("arial", 24)
-                font_text = ImageFont.truetype("arial", 16)
-            except:
-                font_title = ImageFont.load_default()
-                font_text = ImageFont.load_default()
-
-            draw.text((30, 30), "DerivaPlot Function Analysis Report", fill="black", font=font_title)
-
-            y_pos = 80
-            for i, func_data in enumerate(self.current_data['functions']):
-                func_label = f"Function {i+1}: " if i > 0 else "Function: "
-                draw.text((30, y_pos), f"{func_label}{func_data['expr']}", fill="black", font=font_text)
-                y_pos += 30
-
-            draw.text((30, y_pos), f"X Range: [{self.current_data['x_range'][0]}, {self.current_data['x_range'][1]}]", 
-                    fill="black", font=font_text)
-            y_pos += 30
-
-            if 'order' in self.current_data:
-                draw.text((30, y_pos), f"Derivative Order: {self.current_data['order']}", fill="black", font=font_text)
-                y_pos += 30
-
-            if 'critical_values' in self.current_data:
-                y_pos += 10
-                draw.text((30, y_pos), "Critical Values:", fill="black", font=font_text)
-                y_pos += 30
-                
-                for func_data in self.current_data['critical_values']:
-                    cv_text = f"{func_data['expr']}: "
-                    if func_data['critical_values']:
-                        cv_points = ", ".join([f"x={cv['x']:.2f}" for cv in func_data['critical_values']])
-                        cv_text += cv_points
-                    else:
-                        cv_text += "No critical values"
-                    
-                    draw.text((30, y_pos), cv_text, fill="black", font=font_text)
-                    y_pos += 30
-            
-            draw.text((30, y_pos), f"Date: {np.datetime64('today')}", fill="black", font=font_text)
-            y_pos += 30
-            
-            # temp file
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                self.fig.savefig(temp_path, dpi=150, bbox_inches='tight')
-
-            graph_img = Image.open(temp_path)
-            graph_img = graph_img.resize((520, 380), Image.LANCZOS)
-            image.paste(graph_img, (40, y_pos))
-            
-            # Footer
-            footer_text = "Thank you for using DerivaPlot"
-            draw.text((30, receipt_height - 30), footer_text, fill="black", font=font_text)
-
-            image.save(receipt_path)
-            
-            self.status_var.set(f"Report saved to {os.path.basename(receipt_path)}")
-            messagebox.showinfo("Success", f"Report saved successfully to:\n{receipt_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Save Error", f"Error saving function report: {e}")
-        finally:
-            # temp file cleaner
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+        if os.path.splitext(receipt_path)[1].lower() != ".pdf":
+            self.queue_export("Report", receipt_path, render_image_report, self.current_data, self.fig)
+            return
+        exprs = [data["expr"] for data in self.current_data["functions"]]
+        results = self.results
+        if results is not None and results.complete and [record.expr for record in results.records] == exprs:
+            curves = results.curves()
+        else:
+            # the critical-values view keeps no samples; the report worker takes them
+            curves = [{"expr": expr, "order": self.current_data.get("order", 1)} for expr in exprs]
+        self.queue_export("Report", receipt_path, render_pdf_report, self.current_data, curves, self.fig)
 
     def on_refresh(self):
-        if self.fig is not None:
-            plt.close(self.fig)
+        self.cancel_progressive()
         try:
             if hasattr(self, 'canvas'):
                 self.canvas.get_tk_widget().destroy()
@@ -1206,91 +4636,8 @@ class FunctionVisualizerApp:
             self.status_var.set("Refreshing plot...")
             self.root.update()
             
-            # Create plot
-            x_vals = np.linspace(x_range[0], x_range[1], 400)
-            
             try:
-                # Create figure
-                plt.style.use('default')
-                self.fig, ax = plt.subplots(figsize=(8, 5))
-                
-                # Set colors based on theme
-                background_color = "#242424" if self.appearance_mode == "dark" else "white"
-                text_color = "white" if self.appearance_mode == "dark" else "black"
-                self.fig.patch.set_facecolor(background_color)
-                ax.set_facecolor(background_color)
-                
-                # Color cycle for multiple functions
-                colors = plt.cm.tab10.colors
-                
-                all_functions_data = []
-                
-                # Plot each function with its derivative and integral
-                for i, (expr, f) in enumerate(functions):
-                    color_idx = i % len(colors)
-                    base_color = colors[color_idx]
-                    
-                    # Calculate function, derivative and integral
-                    y_vals = f(x_vals)
-                    dydx_vals = self.numerical_derivative(f, x_vals, order_val)
-                    integral_vals = self.numerical_integral(f, x_vals)
-                    
-                    # Plot with different line styles
-                    ax.plot(x_vals, y_vals, label=f'Function: {expr}', 
-                        color=base_color, linewidth=2)
-                    ax.plot(x_vals, dydx_vals, label=f'{order_val}-Order Derivative of {expr}', 
-                        color=base_color, linestyle='dashed', linewidth=1.5)
-                    ax.plot(x_vals, integral_vals, label=f'Integral of {expr}', 
-                        color=base_color, linestyle='dotted', linewidth=1.5)
-                    
-                    # Store data for later use
-                    all_functions_data.append({
-                        "expr": expr,
-                        "function": f,
-                        "y_vals": y_vals,
-                        "derivative": dydx_vals,
-                        "integral": integral_vals
-                    })
-                
-                # Set labels and appearance
-                ax.set_xlabel('x', color=text_color)
-                ax.set_ylabel('y', color=text_color)
-                ax.set_title('Functions, Derivatives, and Integrals', color=text_color)
-                ax.tick_params(colors=text_color)
-                for spine in ax.spines.values():
-                    spine.set_edgecolor(text_color)
-                
-                # Update legend
-                legend = ax.legend()
-                if legend is not None:
-                    frame = legend.get_frame()
-                    frame.set_facecolor(background_color)
-                    frame.set_edgecolor(text_color)
-                    for text in legend.get_texts():
-                        text.set_color(text_color)
-                        
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                
-                # Display in UI
-                self.canvas = FigureCanvasTkAgg(self.fig, master=self.canvas_frame)
-                self.canvas.draw()
-                self.canvas.get_tk_widget().pack(fill="both", expand=True)
-                
-                # navigation toolbar
-                self.toolbar_frame = ctk.CTkFrame(self.canvas_frame)
-                self.toolbar_frame.pack(side="bottom", fill="x")
-                self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
-                self.toolbar.update()
-
-                self.current_data = {
-                    "functions": [{"expr": expr} for expr, _ in functions],
-                    "x_range": x_range,
-                    "order": order_val
-                }
-
-                self.update_statistics(functions, x_range)
-                self.status_var.set("Plot refreshed successfully")
+                self.render_plot(functions, x_range, order_val, refresh=True)
             except Exception as e:
                 messagebox.showerror("Calculation Error", f"Error calculating results: {e}")
                 self.status_var.set("Error in calculation")
@@ -1307,7 +4654,7 @@ class FunctionVisualizerApp:
     def on_closing(self):
         for after_id in self.root.tk.call('after', 'info'):
             self.root.after_cancel(after_id)
-        plt.close('all')
+        self.stop_stream()
         pygame.mixer.music.stop() 
         pygame.mixer.quit()  
         self.root.destroy()
@@ -1315,13 +4662,24 @@ class FunctionVisualizerApp:
     def on_closing(self):
         for after_id in self.root.tk.call('after', 'info'):
             self.root.after_cancel(after_id)
-        plt.close('all') 
+        self.stop_stream()
+        self.integral_engine.close()
         self.root.destroy()
 
 def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        # headless: python UPDATE-7.py --batch manifest.json
+        try:
+            output = run_batch_reports(sys.argv[2], progress=lambda done, total: print(f"{done}/{total} reports"))
+        except Exception as e:
+            sys.exit(f"Batch Error: {e}")
+        print(f"Reports written to {output}")
+        return
     root = ctk.CTk()
     app = FunctionVisualizerApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
+    # in the frozen build, spawned batch workers must not start another window
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file